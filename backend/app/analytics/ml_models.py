@@ -9,10 +9,19 @@ Provides ML capabilities for analytics including:
 - Model evaluation
 """
 
+import asyncio
+import importlib.util
 import logging
+import shutil
+import tempfile
+import uuid
+import weakref
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 from enum import Enum
+import joblib
 import pandas as pd
 import numpy as np
 from pydantic import BaseModel, Field
@@ -21,15 +30,33 @@ from pydantic import BaseModel, Field
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier, IsolationForest
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classification_report
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+# Arrow-backed strings keep categorical encoding in C++ kernels; pandas
+# imports pyarrow itself when the dtype is used, so only probe for it
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+STRING_DTYPE = "string[pyarrow]" if PYARROW_AVAILABLE else "string"
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=16)
+def _load_model(path: str) -> Any:
+    """
+    Load a persisted model from disk
+
+    Models are dumped uncompressed so numpy arrays (e.g. tree node
+    arrays) can be memory-mapped read-only and shared through the
+    page cache instead of being copied into each process heap.
+    """
+    return joblib.load(path, mmap_mode="r")
+
+
 class ModelType(str, Enum):
     """ML model types"""
     REGRESSION = "regression"
@@ -67,14 +94,51 @@ class MLEngine:
     Machine Learning Engine
     
     Handles model training, prediction, and evaluation
+    
+    Args:
+        model_dir: Directory for persisted models; defaults to a private
+            temporary directory, created on first save and removed
+            together with the engine
     """
     
-    def __init__(self):
-        self.models: Dict[str, Any] = {}
+    def __init__(self, model_dir: Optional[Union[str, Path]] = None):
+        self.model_dir: Optional[Path] = Path(model_dir) if model_dir else None
+        # model_id -> path of the persisted model
+        self.models: Dict[str, Path] = {}
         self.scalers: Dict[str, StandardScaler] = {}
-        self.encoders: Dict[str, LabelEncoder] = {}
+        # column -> categories learned at training time
+        self.encoders: Dict[str, pd.Index] = {}
         self.model_metadata: Dict[str, Dict[str, Any]] = {}
     
+    def _get_model_dir(self) -> Path:
+        """Directory for persisted models, created on first use"""
+        if self.model_dir is None:
+            self.model_dir = Path(tempfile.mkdtemp(prefix="mlengine_"))
+            weakref.finalize(self, shutil.rmtree, self.model_dir, ignore_errors=True)
+        else:
+            self.model_dir.mkdir(parents=True, exist_ok=True)
+        return self.model_dir
+    
+    def delete_model(self, model_id: str) -> bool:
+        """
+        Remove a trained model and its persisted file
+        
+        Args:
+            model_id: Model to remove
+            
+        Returns:
+            True if the model existed
+        """
+        model_path = self.models.pop(model_id, None)
+        if model_path is None:
+            return False
+        self.scalers.pop(model_id, None)
+        self.model_metadata.pop(model_id, None)
+        # Drop the memory-mapped copy along with the file
+        _load_model.cache_clear()
+        model_path.unlink(missing_ok=True)
+        return True
+    
     async def prepare_data(
         self,
         data: Union[List[Dict], Dict[str, Any]],
@@ -109,12 +173,7 @@ class MLEngine:
                 y = None
             
             # Encode categorical variables
-            for col in X.select_dtypes(include=['object']).columns:
-                if col not in self.encoders:
-                    self.encoders[col] = LabelEncoder()
-                    X[col] = self.encoders[col].fit_transform(X[col].astype(str))
-                else:
-                    X[col] = self.encoders[col].transform(X[col].astype(str))
+            X = self._encode_categorical_variables(X)
             
             return X, y
             
@@ -122,6 +181,69 @@ class MLEngine:
             logger.error(f"Error preparing data: {e}")
             raise
     
+    def _encode_categorical_variables(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Encode object columns as integer category codes
+        
+        Columns are cast to a string dtype (Arrow-backed when pyarrow is
+        installed) and dictionary-encoded, so no per-cell Python str()
+        conversion is needed. Categories are learned on first sight of a
+        column and reused afterwards.
+        
+        Args:
+            X: Feature matrix
+            
+        Returns:
+            Feature matrix with categorical columns encoded
+            
+        Raises:
+            ValueError: If a column contains labels unseen at training time
+        """
+        for col in X.select_dtypes(include=['object']).columns:
+            values = X[col].astype(STRING_DTYPE)
+            if col not in self.encoders:
+                cat = values.astype("category").cat
+                self.encoders[col] = cat.categories
+            else:
+                cat = values.astype(
+                    pd.CategoricalDtype(self.encoders[col])
+                ).cat
+                unseen = (cat.codes < 0) & values.notna()
+                if unseen.any():
+                    raise ValueError(
+                        f"Column '{col}' contains previously unseen labels: "
+                        f"{list(values[unseen].unique()[:5])}"
+                    )
+            X[col] = cat.codes.astype(np.int32)
+        
+        return X
+    
+    def _scale_features(
+        self,
+        X: pd.DataFrame,
+        scaler: StandardScaler,
+        fit: bool = False
+    ) -> np.ndarray:
+        """
+        Scale features in place on a contiguous float32 array
+        
+        The DataFrame is converted once; the scaler then works on that
+        array without another copy and the ndarray is returned as-is,
+        since the estimators do not need column names.
+        
+        Args:
+            X: Feature matrix
+            scaler: Scaler belonging to the model being trained/used
+            fit: Fit the scaler on X before transforming
+            
+        Returns:
+            Scaled feature array
+        """
+        X_arr = np.asarray(X.to_numpy(), dtype=np.float32, order="C")
+        if fit:
+            return scaler.fit_transform(X_arr)
+        return scaler.transform(X_arr, copy=False)
+    
     async def train_model(
         self,
         X: pd.DataFrame,
@@ -147,10 +269,10 @@ class MLEngine:
                 random_state=config.random_state
             )
             
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+            # Scale features (scaler is stored per model below)
+            scaler = StandardScaler(copy=False)
+            X_train_scaled = self._scale_features(X_train, scaler, fit=True)
+            X_test_scaled = self._scale_features(X_test, scaler)
             
             # Select and train model
             if config.model_type == ModelType.REGRESSION:
@@ -182,8 +304,11 @@ class MLEngine:
                 raise ValueError(f"Unsupported model type: {config.model_type}")
             
             # Store model
-            model_id = f"{config.model_type}_{datetime.utcnow().timestamp()}"
-            self.models[model_id] = model
+            model_id = f"{config.model_type.value}_{uuid.uuid4().hex[:12]}"
+            model_path = self._get_model_dir() / f"{model_id}.joblib"
+            # File I/O off the event loop
+            await asyncio.to_thread(joblib.dump, model, model_path)
+            self.models[model_id] = model_path
             self.scalers[model_id] = scaler
             self.model_metadata[model_id] = {
                 "config": config.dict(),
@@ -268,12 +393,12 @@ class MLEngine:
             # Get model
             model_id = context.get("model_id") if context else None
             if not model_id or model_id not in self.models:
-                # Use most recent model
+                # Use most recent model (dicts keep insertion order)
                 if not self.models:
                     raise ValueError("No trained models available")
-                model_id = max(self.models.keys())
+                model_id = next(reversed(self.models))
             
-            model = self.models[model_id]
+            model = await asyncio.to_thread(_load_model, str(self.models[model_id]))
             scaler = self.scalers[model_id]
             metadata = self.model_metadata[model_id]
             
@@ -285,16 +410,35 @@ class MLEngine:
             X = X[expected_features]
             
             # Scale and predict
-            X_scaled = scaler.transform(X)
-            predictions = model.predict(X_scaled)
+            X_scaled = self._scale_features(X, scaler)
             
-            return {
+            # Classifiers: one predict_proba pass gives both the labels
+            # (what predict() would return) and the confidence scores
+            probabilities = None
+            if hasattr(model, "predict_proba"):
+                probabilities = model.predict_proba(X_scaled)
+                best = probabilities.argmax(axis=1)
+                predictions = model.classes_.take(best)
+            else:
+                predictions = model.predict(X_scaled)
+            
+            results = {
                 "predictions": predictions.tolist(),
                 "model_id": model_id,
                 "model_type": metadata["config"]["model_type"],
                 "count": len(predictions)
             }
             
+            # Only serialize the full probability matrix when asked for it
+            if probabilities is not None:
+                results["confidence_scores"] = probabilities[
+                    np.arange(len(best)), best
+                ].tolist()
+                if context and context.get("include_probabilities"):
+                    results["probabilities"] = probabilities.tolist()
+            
+            return results
+            
         except Exception as e:
             logger.error(f"Error making predictions: {e}")
             raise
@@ -409,6 +553,10 @@ class MLEngine:
         Returns:
             List of confidence scores
         """
+        # Use model-derived scores when predict() produced them
+        if "confidence_scores" in predictions:
+            return predictions["confidence_scores"]
+        
         # Simplified confidence calculation
         # In production, use model-specific methods
         pred_values = predictions.get("predictions", [])
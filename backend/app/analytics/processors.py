@@ -692,15 +692,14 @@ class DataProcessor:
         if strategy == "drop":
             return df.dropna()
         elif strategy == "mean":
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
+            # fillna with a per-column Series only touches numeric columns
+            df = df.fillna(df.mean(numeric_only=True))
         elif strategy == "median":
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
+            df = df.fillna(df.median(numeric_only=True))
         elif strategy == "forward_fill":
-            df = df.fillna(method='ffill')
+            df = df.ffill()
         elif strategy == "backward_fill":
-            df = df.fillna(method='bfill')
+            df = df.bfill()
         
         return df
     
@@ -73,6 +73,10 @@ class ErrorCode(str, Enum):
     ANALYTICS_CONNECTOR_ERROR = "ERR_1802"
 
 
+# Precomputed code -> value mapping (avoids enum descriptor lookups)
+_ERROR_CODE_VALUES: Dict[ErrorCode, str] = {ec: ec.value for ec in ErrorCode}
+
+
 class AppException(Exception):
     """
     Base exception class for all application exceptions
@@ -99,18 +103,22 @@ class AppException(Exception):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert exception to dictionary for API responses"""
-        result = {
+        if self.original_error is None:
+            return {
+                "error": self.message,
+                "error_code": _ERROR_CODE_VALUES[self.error_code],
+                "context": self.context
+            }
+        return {
             "error": self.message,
-            "error_code": self.error_code.value,
-            "context": self.context
+            "error_code": _ERROR_CODE_VALUES[self.error_code],
+            "context": self.context,
+            "original_error": str(self.original_error)
         }
-        if self.original_error:
-            result["original_error"] = str(self.original_error)
-        return result
     
     def __str__(self) -> str:
         """String representation of the exception"""
-        parts = [f"{self.error_code.value}: {self.message}"]
+        parts = [f"{_ERROR_CODE_VALUES[self.error_code]}: {self.message}"]
         if self.context:
             parts.append(f"Context: {self.context}")
         if self.original_error:
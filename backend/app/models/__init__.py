@@ -30,7 +30,7 @@ from app.models.base import (
     ToolCall,
 )
 from app.models.registry import ModelRegistry, get_registry
-from app.models.router import ModelRouter, get_router
+from app.models.router import ModelRouter, BatchingRouter, get_router
 
 __all__ = [
     "BaseModelProvider",
@@ -43,5 +43,6 @@ __all__ = [
     "ModelRegistry",
     "get_registry",
     "ModelRouter",
+    "BatchingRouter",
     "get_router",
 ]
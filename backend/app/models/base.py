@@ -6,14 +6,27 @@ Provides unified API for interacting with different LLM providers.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncIterator, Union
+from typing import List, Dict, Any, Optional, AsyncIterator, Union, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
+import hashlib
 import logging
+import random
+import time
+import weakref
 
 logger = logging.getLogger(__name__)
 
+# validate_config() trusts a successful generation this recent (seconds)
+RECENT_SUCCESS_WINDOW = 120.0
+
+# Token counts keyed by (provider, model, blake2b(text)); bounded LRU
+_TOKEN_COUNT_CACHE_SIZE = 4096
+_token_count_cache: "OrderedDict[Tuple[str, str, bytes], int]" = OrderedDict()
+
 
 class ModelProvider(str, Enum):
     """Supported model providers"""
@@ -40,7 +53,7 @@ class ModelCapability(str, Enum):
     EMBEDDINGS = "embeddings"
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class ModelCapabilities:
     """Model capabilities and limitations"""
     supports_streaming: bool = True
@@ -55,9 +68,20 @@ class ModelCapabilities:
     supports_stop_sequences: bool = True
     cost_per_1k_input_tokens: float = 0.0
     cost_per_1k_output_tokens: float = 0.0
+    
+    # Combined input + output cost per 1k tokens, used as a sort key
+    _total_cost: float = field(init=False, repr=False, compare=False)
+    # Integer per-token rates in picodollars (1e-12 USD) for calculate_cost
+    _input_pico_per_token: int = field(init=False, repr=False, compare=False)
+    _output_pico_per_token: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._total_cost = self.cost_per_1k_input_tokens + self.cost_per_1k_output_tokens
+        self._input_pico_per_token = round(self.cost_per_1k_input_tokens * 1e9)
+        self._output_pico_per_token = round(self.cost_per_1k_output_tokens * 1e9)
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall:
     """Function call from model"""
     name: str
@@ -65,7 +89,7 @@ class FunctionCall:
     id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     """Tool call from model (OpenAI format)"""
     id: str
@@ -73,7 +97,7 @@ class ToolCall:
     function: FunctionCall
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamChunk:
     """Streaming response chunk"""
     content: str
@@ -82,7 +106,7 @@ class StreamChunk:
     tool_calls: Optional[List[ToolCall]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ModelResponse:
     """Unified model response"""
     content: str
@@ -93,22 +117,41 @@ class ModelResponse:
     function_call: Optional[FunctionCall] = None
     tool_calls: Optional[List[ToolCall]] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
-    created_at: datetime = field(default_factory=datetime.utcnow)
+    created_at: float = field(default_factory=time.time)  # Unix timestamp
     latency_ms: Optional[float] = None
     cost: Optional[float] = None
+    
+    @property
+    def created_at_iso(self) -> str:
+        """Creation time as an ISO 8601 UTC string"""
+        return datetime.fromtimestamp(self.created_at, timezone.utc).isoformat()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RetryConfig:
-    """Retry configuration"""
+    """
+    Retry configuration
+    
+    Frozen so the precomputed delays can't go stale; use
+    dataclasses.replace() to derive a different configuration.
+    """
     max_retries: int = 3
     initial_delay: float = 1.0
     max_delay: float = 60.0
     exponential_base: float = 2.0
     jitter: bool = True
+    
+    # Backoff delay (before jitter) for each attempt, computed once
+    _delays: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "_delays", tuple(
+            min(self.initial_delay * self.exponential_base ** i, self.max_delay)
+            for i in range(self.max_retries)
+        ))
 
 
-@dataclass
+@dataclass(slots=True, eq=False, repr=False)
 class ModelConfig:
     """Model configuration"""
     provider: ModelProvider
@@ -143,6 +186,22 @@ class ModelConfig:
         
         if self.max_tokens < 1:
             raise ValueError("max_tokens must be positive")
+    
+    def cache_key(self) -> Tuple[ModelProvider, str, str, Optional[str]]:
+        """
+        Hashable identity used to share provider instances
+        
+        Generation parameters and extra_params are per-request knobs
+        and deliberately not part of the key.
+        """
+        return (self.provider, self.model_name, self.api_key, self.api_base)
+    
+    def __repr__(self) -> str:
+        # Never include the API key
+        return (
+            f"ModelConfig(provider={self.provider.value}, "
+            f"model_name={self.model_name!r}, api_base={self.api_base!r})"
+        )
 
 
 class BaseModelProvider(ABC):
@@ -163,6 +222,9 @@ class BaseModelProvider(ABC):
         self.config = config
         self.provider = config.provider
         self.model_name = config.model_name
+        # time.monotonic() of the last successful provider call
+        self._last_success_ts: Optional[float] = None
+        self._capabilities: Optional[ModelCapabilities] = None
         
         logger.info(
             f"Initialized {self.provider} provider with model {self.model_name}"
@@ -204,21 +266,65 @@ class BaseModelProvider(ABC):
         """
         pass
     
-    @abstractmethod
     def get_capabilities(self) -> ModelCapabilities:
         """
         Get model capabilities
         
+        Capabilities are fixed per model, so they are computed once and
+        cached on the instance.
+        
         Returns:
             ModelCapabilities describing what this model can do
         """
-        pass
+        if self._capabilities is None:
+            self._capabilities = self._compute_capabilities()
+        return self._capabilities
     
     @abstractmethod
+    def _compute_capabilities(self) -> ModelCapabilities:
+        """
+        Build model capabilities
+        
+        Returns:
+            ModelCapabilities describing what this model can do
+        """
+        pass
+    
     async def count_tokens(self, text: str) -> int:
         """
         Count tokens in text
         
+        Results are cached by content hash per provider and model, so
+        repeated system prompts and histories are not re-tokenized.
+        
+        Args:
+            text: Text to count tokens for
+            
+        Returns:
+            Number of tokens
+        """
+        key = (
+            self.provider.value,
+            self.model_name,
+            hashlib.blake2b(text.encode(), digest_size=16).digest(),
+        )
+        
+        count = _token_count_cache.get(key)
+        if count is not None:
+            _token_count_cache.move_to_end(key)
+            return count
+        
+        count = await self._count_tokens_uncached(text)
+        _token_count_cache[key] = count
+        if len(_token_count_cache) > _TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+        return count
+    
+    @abstractmethod
+    async def _count_tokens_uncached(self, text: str) -> int:
+        """
+        Count tokens in text using the provider's tokenizer
+        
         Args:
             text: Text to count tokens for
             
@@ -234,17 +340,36 @@ class BaseModelProvider(ABC):
         Returns:
             True if configuration is valid and provider is reachable
         """
+        # A real request just succeeded; no need to spend a probe
+        if (
+            self._last_success_ts is not None
+            and time.monotonic() - self._last_success_ts < RECENT_SUCCESS_WINDOW
+        ):
+            return True
+        
         try:
             # Try a simple generation
             response = await self.generate(
                 messages=[{"role": "user", "content": "Hi"}],
                 max_tokens=5
             )
-            return response is not None
+            if response is None:
+                return False
+            self.record_success()
+            return True
         except Exception as e:
             logger.error(f"Configuration validation failed: {e}")
             return False
     
+    def record_success(self):
+        """
+        Record that a provider call succeeded
+        
+        Called by _retry_with_backoff; callers issuing requests outside it
+        (e.g. streaming) can call it directly.
+        """
+        self._last_success_ts = time.monotonic()
+    
     def calculate_cost(
         self,
         input_tokens: int,
@@ -262,10 +387,11 @@ class BaseModelProvider(ABC):
         """
         capabilities = self.get_capabilities()
         
-        input_cost = (input_tokens / 1000) * capabilities.cost_per_1k_input_tokens
-        output_cost = (output_tokens / 1000) * capabilities.cost_per_1k_output_tokens
-        
-        return input_cost + output_cost
+        # Exact integer multiply-add, one conversion back to USD
+        return (
+            input_tokens * capabilities._input_pico_per_token +
+            output_tokens * capabilities._output_pico_per_token
+        ) / 1e12
     
     def _prepare_messages(
         self,
@@ -322,26 +448,20 @@ class BaseModelProvider(ABC):
         Raises:
             Last exception if all retries fail
         """
-        import asyncio
-        import random
-        
         retry_config = self.config.retry_config
         last_exception = None
         
         for attempt in range(retry_config.max_retries):
             try:
-                return await func(*args, **kwargs)
+                result = await func(*args, **kwargs)
+                self.record_success()
+                return result
             except Exception as e:
                 last_exception = e
                 
                 if attempt < retry_config.max_retries - 1:
-                    # Calculate delay with exponential backoff
-                    delay = min(
-                        retry_config.initial_delay * (
-                            retry_config.exponential_base ** attempt
-                        ),
-                        retry_config.max_delay
-                    )
+                    # Exponential backoff from the precomputed table
+                    delay = retry_config._delays[attempt]
                     
                     # Add jitter if enabled
                     if retry_config.jitter:
@@ -362,15 +482,29 @@ class BaseModelProvider(ABC):
         return f"{self.__class__.__name__}(provider={self.provider}, model={self.model_name})"
 
 
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Running event loop, or None when called outside of one"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 class ModelProviderFactory:
     """
     Factory for creating model providers
     
-    Handles provider instantiation and caching.
+    Handles provider instantiation and caching. Instances are cached per
+    event loop, since providers may hold HTTP clients bound to the loop
+    they were created on.
     """
     
     _providers: Dict[str, type] = {}
-    _instances: Dict[str, BaseModelProvider] = {}
+    # (id(loop) or None, config cache key) -> (weakref to loop, instance)
+    _instances: Dict[
+        Tuple[Optional[int], Tuple[ModelProvider, str, str, Optional[str]]],
+        Tuple[Optional["weakref.ref"], BaseModelProvider]
+    ] = {}
     
     @classmethod
     def register(cls, provider: ModelProvider, provider_class: type):
@@ -387,7 +521,7 @@ class ModelProviderFactory:
     @classmethod
     def create(cls, config: ModelConfig) -> BaseModelProvider:
         """
-        Create or get cached provider instance
+        Create or get cached provider instance for the running loop
         
         Args:
             config: Model configuration
@@ -395,24 +529,52 @@ class ModelProviderFactory:
         Returns:
             Provider instance
         """
-        # Create cache key
-        cache_key = f"{config.provider}:{config.model_name}:{config.api_key[:8]}"
+        loop = _current_loop()
+        cache_key = (id(loop) if loop is not None else None, config.cache_key())
         
-        # Return cached instance if available
-        if cache_key in cls._instances:
-            return cls._instances[cache_key]
+        # Return cached instance if it belongs to this (still live) loop;
+        # loop ids can be reused once a loop is garbage collected
+        cached = cls._instances.get(cache_key)
+        if cached is not None:
+            loop_ref, instance = cached
+            if loop_ref is None or loop_ref() is loop:
+                return instance
         
         # Get provider class
         provider_class = cls._providers.get(config.provider.value)
         if not provider_class:
             raise ValueError(f"Unknown provider: {config.provider}")
         
+        # Drop instances whose event loop has been garbage collected
+        for key in [
+            key for key, (ref, _) in cls._instances.items()
+            if ref is not None and ref() is None
+        ]:
+            del cls._instances[key]
+        
         # Create new instance
         instance = provider_class(config)
-        cls._instances[cache_key] = instance
+        loop_ref = weakref.ref(loop) if loop is not None else None
+        cls._instances[cache_key] = (loop_ref, instance)
         
         return instance
     
+    @classmethod
+    def clear_cache_for_loop(cls, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Drop provider instances created on an event loop
+        
+        Intended for worker shutdown hooks.
+        
+        Args:
+            loop: Event loop (defaults to the running loop)
+        """
+        loop = loop or _current_loop()
+        loop_id = id(loop) if loop is not None else None
+        for key in [key for key in cls._instances if key[0] == loop_id]:
+            del cls._instances[key]
+        logger.info("Provider cache cleared for event loop")
+    
     @classmethod
     def clear_cache(cls):
         """Clear provider cache"""
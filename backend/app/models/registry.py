@@ -6,10 +6,20 @@ Provides model discovery, capability querying, and health monitoring.
 """
 
 import logging
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+import operator
+import re
+from typing import (
+    Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional,
+    Set, Tuple
+)
+from bisect import insort
+from collections import defaultdict, deque
+from dataclasses import InitVar, dataclass, field
+from datetime import datetime, timezone
 import asyncio
+import hashlib
+import sys
+import time
 
 from app.models.base import (
     BaseModelProvider,
@@ -22,18 +32,212 @@ from app.models.base import (
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class ModelInfo:
+# Health-check probe budgets per provider: how many probes may be in
+# flight at once and how many may be issued per rolling minute
+# (0 = unlimited, e.g. local models).
+PROVIDER_PROFILES: Dict[ModelProvider, Dict[str, int]] = {
+    ModelProvider.OPENAI: {'max_concurrency': 10, 'requests_per_minute': 500},
+    ModelProvider.ANTHROPIC: {'max_concurrency': 5, 'requests_per_minute': 50},
+    ModelProvider.OLLAMA: {'max_concurrency': 2, 'requests_per_minute': 0},
+}
+
+DEFAULT_PROVIDER_PROFILE: Dict[str, int] = {
+    'max_concurrency': 5,
+    'requests_per_minute': 60,
+}
+
+# Seconds a provider probe result is reused for other models sharing
+# the same provider credentials
+PROBE_CACHE_TTL = 60.0
+
+# Capability names accepted by find_models_by_capability, mapped to a
+# predicate over ModelCapabilities
+CAP_PREDICATES: Dict[str, Callable[[ModelCapabilities], bool]] = {
+    'function_calling': operator.attrgetter('supports_function_calling'),
+    'vision': operator.attrgetter('supports_vision'),
+    'streaming': operator.attrgetter('supports_streaming'),
+    'json_mode': operator.attrgetter('supports_json_mode'),
+}
+
+# One bit per capability (function_calling=1, vision=2, streaming=4,
+# json_mode=8) so capability requirements reduce to a mask test
+CAP_BITS: Dict[str, int] = {
+    capability: 1 << i for i, capability in enumerate(CAP_PREDICATES)
+}
+
+
+def capability_mask(capabilities: Iterable[str]) -> int:
+    """
+    Combined CAP_BITS mask for capability names
+    
+    Unknown names contribute no bit, so they impose no constraint.
+    
+    Args:
+        capabilities: Capability names
+        
+    Returns:
+        Bitmask to test against ModelInfo._cap_bits
+    """
+    mask = 0
+    for capability in capabilities:
+        mask |= CAP_BITS.get(capability, 0)
+    return mask
+
+
+# Heuristic: smaller models are generally faster
+# Priority: haiku > small > medium > large
+SPEED_PRIORITY: Dict[str, int] = {
+    'haiku': 0,
+    'small': 1,
+    'mini': 1,
+    'turbo': 2,
+    'medium': 3,
+    'large': 4,
+    'opus': 5,
+    'ultra': 6,
+}
+SPEED_REGEX = re.compile("|".join(map(re.escape, SPEED_PRIORITY)))
+
+# Heuristic: more expensive models are generally higher quality
+# Priority: opus > large > medium > small
+QUALITY_PRIORITY: Dict[str, int] = {
+    'opus': 0,
+    'ultra': 0,
+    'large': 1,
+    'turbo': 2,
+    'medium': 3,
+    'small': 4,
+    'mini': 5,
+    'haiku': 5,
+}
+
+# Normalized quality (0-1 scale based on model tier) for balanced routing;
+# must have the same keys as QUALITY_PRIORITY
+QUALITY_SCORES: Dict[str, float] = {
+    'opus': 1.0, 'ultra': 1.0, 'large': 0.8,
+    'turbo': 0.7, 'medium': 0.6, 'small': 0.4,
+    'mini': 0.3, 'haiku': 0.3
+}
+QUALITY_REGEX = re.compile("|".join(map(re.escape, QUALITY_PRIORITY)))
+
+# Sort key: combined input + output cost per 1k tokens
+_model_cost = operator.attrgetter('capabilities._total_cost')
+_speed_tier = operator.attrgetter('_speed_tier')
+
+
+class _AvailabilityHook:
+    """
+    Slot for the owning registry's availability callback
+    
+    Kept outside the dataclass fields so asdict(), replace(), repr and
+    comparisons never see (or deep-copy) the registry behind it.
+    """
+    __slots__ = ("_on_availability_change",)
+
+
+@dataclass(slots=True)
+class ModelInfo(_AvailabilityHook):
     """Information about a registered model"""
     provider: ModelProvider
     model_name: str
     display_name: str
     capabilities: ModelCapabilities
-    is_available: bool = True
-    last_health_check: Optional[datetime] = None
+    # Initial availability; stored in _is_available (see is_available below)
+    is_available: InitVar[bool] = True
+    last_health_check: Optional[float] = None  # time.monotonic() of last check
     health_check_failures: int = 0
     tags: Set[str] = field(default_factory=set)
     metadata: Dict[str, any] = field(default_factory=dict)
+    
+    # Backing field for is_available; changes are reported to the owning
+    # registry (if any) through _on_availability_change so it can keep
+    # its counters and caches in sync
+    _is_available: bool = field(default=True, init=False)
+    
+    # Registry key (provider:model_name) and lower-cased model_name,
+    # computed once
+    _model_id: str = field(init=False, repr=False, compare=False)
+    _name_lower: str = field(init=False, repr=False, compare=False)
+    
+    # Bitmask of supported capabilities (see CAP_BITS)
+    _cap_bits: int = field(init=False, repr=False, compare=False)
+    
+    # Routing sort keys, computed once so selectors can use attrgetter
+    _cost_sum: float = field(init=False, repr=False, compare=False)
+    _speed_tier: int = field(init=False, repr=False, compare=False)
+    _quality_tier: int = field(init=False, repr=False, compare=False)
+    _quality_score: float = field(init=False, repr=False, compare=False)
+    _balance_score: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self, is_available: bool):
+        self._is_available = bool(is_available)
+        self._on_availability_change: Optional[Callable[["ModelInfo", bool], None]] = None
+        self._model_id = f"{self.provider.value}:{self.model_name}"
+        self._name_lower = self.model_name.lower()
+        self._cost_sum = self.capabilities._total_cost
+        self._cap_bits = 0
+        for capability, predicate in CAP_PREDICATES.items():
+            if predicate(self.capabilities):
+                self._cap_bits |= CAP_BITS[capability]
+        
+        # Tiers default to medium when the name matches no known tier
+        speed_matches = SPEED_REGEX.findall(self._name_lower)
+        self._speed_tier = min(map(SPEED_PRIORITY.__getitem__, speed_matches), default=3)
+        quality_matches = QUALITY_REGEX.findall(self._name_lower)
+        self._quality_tier = min(
+            map(QUALITY_PRIORITY.__getitem__, quality_matches), default=3
+        )
+        
+        # Balance score (lower is better): 60% quality, 40% cost, with
+        # cost normalized assuming max $0.1 per 1k tokens
+        cost_score = min(self._cost_sum / 2 / 0.1, 1.0)
+        self._quality_score = max(
+            map(QUALITY_SCORES.__getitem__, quality_matches), default=0.5
+        )
+        self._balance_score = (0.4 * cost_score) + (0.6 * (1 - self._quality_score))
+    
+    def _get_is_available(self) -> bool:
+        return self._is_available
+    
+    def _set_is_available(self, value: bool):
+        value = bool(value)
+        if value == self._is_available:
+            return
+        self._is_available = value
+        if self._on_availability_change is not None:
+            self._on_availability_change(self, value)
+    
+    @property
+    def last_health_check_at(self) -> Optional[datetime]:
+        """Wall-clock (UTC) time of the last health check"""
+        if self.last_health_check is None:
+            return None
+        elapsed = time.monotonic() - self.last_health_check
+        return datetime.fromtimestamp(time.time() - elapsed, timezone.utc)
+
+
+# Installed after @dataclass, which reads the class attribute of the same
+# name as the default of the is_available InitVar
+ModelInfo.is_available = property(
+    ModelInfo._get_is_available,
+    ModelInfo._set_is_available,
+    doc="Whether the model can currently be routed to"
+)
+
+
+def _pareto_frontier(models: Iterable[ModelInfo]) -> Tuple[ModelInfo, ...]:
+    """Skyline sweep over models sorted by cost (cheapest, then best quality first)"""
+    frontier: List[ModelInfo] = []
+    for model in sorted(
+        models, key=lambda m: (m._cost_sum, m._quality_tier, -m._quality_score)
+    ):
+        if not any(
+            kept._quality_tier <= model._quality_tier
+            and kept._quality_score >= model._quality_score
+            for kept in frontier
+        ):
+            frontier.append(model)
+    return tuple(frontier)
 
 
 class ModelRegistry:
@@ -49,9 +253,93 @@ class ModelRegistry:
         self._providers: Dict[ModelProvider, BaseModelProvider] = {}
         self._health_check_interval = 300  # 5 minutes
         self._health_check_task: Optional[asyncio.Task] = None
+        self._provider_semaphores: Dict[ModelProvider, asyncio.Semaphore] = {}
+        self._probe_times: Dict[ModelProvider, Deque[float]] = defaultdict(deque)
+        self._probe_cache: Dict[Tuple[ModelProvider, str], Tuple[float, bool]] = {}
+        self._probe_inflight: Dict[Tuple[ModelProvider, str], asyncio.Task] = {}
+        
+        # Indexes maintained by register_model; model ids sorted by cost
+        # (or by speed tier for _by_speed)
+        self._by_cost: List[str] = []
+        self._by_speed: List[str] = []
+        self._by_capability: Dict[str, List[str]] = {
+            capability: [] for capability in CAP_PREDICATES
+        }
+        self._by_provider: Dict[ModelProvider, List[str]] = defaultdict(list)
+        
+        # O(1) stats, maintained on (un)indexing and availability changes
+        self._available_count = 0
+        self._provider_counts: Dict[str, Dict[str, int]] = {}
+        
+        # Bumped whenever models or their availability change
+        self._version = 0
+        self._capability_cache: Dict[
+            Tuple[str, Optional[int], Optional[float]], List[ModelInfo]
+        ] = {}
+        self._frontier: Optional[Tuple[ModelInfo, ...]] = None
         
         logger.info("Model registry initialized")
     
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever registry contents or availability change"""
+        return self._version
+    
+    def _invalidate(self):
+        """Bump the registry version and drop cached query results"""
+        self._version += 1
+        self._capability_cache.clear()
+        self._frontier = None
+    
+    def _cost_of(self, model_id: str) -> float:
+        return _model_cost(self._models[model_id])
+    
+    def _speed_of(self, model_id: str) -> int:
+        return _speed_tier(self._models[model_id])
+    
+    def _index_model(self, model_id: str, model: ModelInfo):
+        """Add a model to the cost, speed, capability and provider indexes"""
+        insort(self._by_cost, model_id, key=self._cost_of)
+        insort(self._by_speed, model_id, key=self._speed_of)
+        for capability, predicate in CAP_PREDICATES.items():
+            if predicate(model.capabilities):
+                insort(self._by_capability[capability], model_id, key=self._cost_of)
+        self._by_provider[model.provider].append(model_id)
+        
+        counts = self._provider_counts.setdefault(
+            model.provider.value, {'total': 0, 'available': 0}
+        )
+        counts['total'] += 1
+        if model.is_available:
+            counts['available'] += 1
+            self._available_count += 1
+        model._on_availability_change = self._on_availability_change
+    
+    def _unindex_model(self, model_id: str, model: ModelInfo):
+        """Remove a model from all indexes"""
+        self._by_cost.remove(model_id)
+        self._by_speed.remove(model_id)
+        for model_ids in self._by_capability.values():
+            if model_id in model_ids:
+                model_ids.remove(model_id)
+        self._by_provider[model.provider].remove(model_id)
+        
+        counts = self._provider_counts[model.provider.value]
+        counts['total'] -= 1
+        if model.is_available:
+            counts['available'] -= 1
+            self._available_count -= 1
+        if not counts['total']:
+            del self._provider_counts[model.provider.value]
+        model._on_availability_change = None
+    
+    def _on_availability_change(self, model: ModelInfo, available: bool):
+        """Keep counters and cached queries in sync with ModelInfo.is_available"""
+        delta = 1 if available else -1
+        self._available_count += delta
+        self._provider_counts[model.provider.value]['available'] += delta
+        self._invalidate()
+    
     def register_model(
         self,
         provider: ModelProvider,
@@ -74,17 +362,45 @@ class ModelRegistry:
         """
         model_id = f"{provider.value}:{model_name}"
         
-        self._models[model_id] = ModelInfo(
+        existing = self._models.get(model_id)
+        if existing is not None:
+            self._unindex_model(model_id, existing)
+        
+        model = ModelInfo(
             provider=provider,
             model_name=model_name,
             display_name=display_name,
             capabilities=capabilities,
-            tags=tags or set(),
+            # Intern tags so identical tags across models share one string
+            tags={sys.intern(tag) for tag in tags} if tags else set(),
             metadata=metadata or {}
         )
+        self._models[model_id] = model
+        self._index_model(model_id, model)
+        self._invalidate()
         
         logger.info(f"Registered model: {model_id}")
     
+    def unregister_model(self, model_id: str) -> bool:
+        """
+        Remove a model from the registry
+        
+        Args:
+            model_id: Model identifier (provider:model_name)
+            
+        Returns:
+            True if the model was registered
+        """
+        model = self._models.pop(model_id, None)
+        if model is None:
+            return False
+        
+        self._unindex_model(model_id, model)
+        self._invalidate()
+        
+        logger.info(f"Unregistered model: {model_id}")
+        return True
+    
     def get_model(self, model_id: str) -> Optional[ModelInfo]:
         """
         Get model information
@@ -102,33 +418,51 @@ class ModelRegistry:
         provider: Optional[ModelProvider] = None,
         tags: Optional[Set[str]] = None,
         available_only: bool = True
-    ) -> List[ModelInfo]:
+    ) -> Iterator[ModelInfo]:
         """
-        List registered models
+        Iterate over registered models
         
         Args:
             provider: Filter by provider
             tags: Filter by tags (any match)
             available_only: Only return available models
             
-        Returns:
-            List of ModelInfo objects
+        Yields:
+            Matching ModelInfo objects
         """
-        models = list(self._models.values())
-        
-        # Filter by provider
+        # Filter by provider via the provider index
         if provider:
-            models = [m for m in models if m.provider == provider]
+            models = (self._models[mid] for mid in self._by_provider.get(provider, ()))
+        else:
+            models = self._models.values()
         
-        # Filter by tags
-        if tags:
-            models = [m for m in models if m.tags & tags]
+        for model in models:
+            # Filter by tags
+            if tags and not (model.tags & tags):
+                continue
+            
+            # Filter by availability
+            if available_only and not model.is_available:
+                continue
+            
+            yield model
+    
+    def list_models_as_list(
+        self,
+        provider: Optional[ModelProvider] = None,
+        tags: Optional[Set[str]] = None,
+        available_only: bool = True
+    ) -> List[ModelInfo]:
+        """
+        List registered models
         
-        # Filter by availability
-        if available_only:
-            models = [m for m in models if m.is_available]
+        Same filters as list_models, materialized for callers that need
+        to sort, index or iterate more than once.
         
-        return models
+        Returns:
+            List of ModelInfo objects
+        """
+        return list(self.list_models(provider, tags, available_only))
     
     def list_providers(self) -> List[ModelProvider]:
         """
@@ -155,47 +489,64 @@ class ModelRegistry:
             max_cost: Maximum cost per 1k tokens
             
         Returns:
-            List of matching ModelInfo objects
+            List of matching ModelInfo objects, cheapest first
         """
-        matching_models = []
-        
-        for model in self._models.values():
-            if not model.is_available:
-                continue
-            
-            caps = model.capabilities
+        cache_key = (capability, min_context_length, max_cost)
+        matching_models = self._capability_cache.get(cache_key)
+        
+        if matching_models is None:
+            # Capability index is already sorted by cost (cheapest first);
+            # unknown capability names impose no capability filter
+            candidates = self._by_capability.get(capability, self._by_cost)
+            matching_models = []
             
-            # Check capability
-            if capability == 'function_calling' and not caps.supports_function_calling:
-                continue
-            if capability == 'vision' and not caps.supports_vision:
-                continue
-            if capability == 'streaming' and not caps.supports_streaming:
-                continue
-            if capability == 'json_mode' and not caps.supports_json_mode:
-                continue
-            
-            # Check context length
-            if min_context_length and caps.max_context_length < min_context_length:
-                continue
-            
-            # Check cost
-            if max_cost:
-                avg_cost = (caps.cost_per_1k_input_tokens + caps.cost_per_1k_output_tokens) / 2
-                if avg_cost > max_cost:
+            for model_id in candidates:
+                model = self._models[model_id]
+                if not model.is_available:
                     continue
+                
+                caps = model.capabilities
+                
+                # Check context length
+                if min_context_length and caps.max_context_length < min_context_length:
+                    continue
+                
+                # Check cost
+                if max_cost:
+                    avg_cost = caps._total_cost / 2
+                    if avg_cost > max_cost:
+                        continue
+                
+                matching_models.append(model)
             
-            matching_models.append(model)
-        
-        # Sort by cost (cheapest first)
-        matching_models.sort(
-            key=lambda m: (
-                m.capabilities.cost_per_1k_input_tokens +
-                m.capabilities.cost_per_1k_output_tokens
-            )
-        )
+            self._capability_cache[cache_key] = matching_models
         
-        return matching_models
+        return list(matching_models)
+    
+    def pareto_frontier(
+        self,
+        models: Optional[Iterable[ModelInfo]] = None
+    ) -> Tuple[ModelInfo, ...]:
+        """
+        Get the models not dominated on cost and quality
+        
+        A model is dominated when another model is at most as expensive,
+        has at most its quality tier, and has at least its quality score.
+        Cost-, quality- and balance-optimized selection always picks a
+        frontier model, so selectors only need to look at these.
+        
+        Args:
+            models: Candidates (defaults to all available models; that
+                result is cached until the registry changes)
+            
+        Returns:
+            Frontier models, cheapest first
+        """
+        if models is None:
+            if self._frontier is None:
+                self._frontier = _pareto_frontier(self.list_models(available_only=True))
+            return self._frontier
+        return _pareto_frontier(models)
     
     def get_cheapest_model(
         self,
@@ -212,35 +563,25 @@ class ModelRegistry:
         Returns:
             Cheapest ModelInfo or None
         """
-        models = list(self._models.values())
-        
-        # Filter available models
-        models = [m for m in models if m.is_available]
-        
-        # Filter by context length
-        if min_context_length:
-            models = [
-                m for m in models
-                if m.capabilities.max_context_length >= min_context_length
-            ]
-        
-        # Filter by capabilities
+        # Walk the smallest cost-sorted index that covers one required
+        # capability; the first model passing the checks is the cheapest
+        candidates = self._by_cost
+        mask = 0
         if required_capabilities:
+            mask = capability_mask(required_capabilities)
             for capability in required_capabilities:
-                models = self.find_models_by_capability(capability)
-        
-        if not models:
-            return None
-        
-        # Sort by cost
-        models.sort(
-            key=lambda m: (
-                m.capabilities.cost_per_1k_input_tokens +
-                m.capabilities.cost_per_1k_output_tokens
-            )
-        )
+                bucket = self._by_capability.get(capability)
+                if bucket is not None and len(bucket) < len(candidates):
+                    candidates = bucket
         
-        return models[0]
+        for model_id in candidates:
+            model = self._models[model_id]
+            if not model.is_available or (model._cap_bits & mask) != mask:
+                continue
+            if min_context_length and model.capabilities.max_context_length < min_context_length:
+                continue
+            return model
+        return None
     
     def get_fastest_model(
         self,
@@ -258,42 +599,14 @@ class ModelRegistry:
         Returns:
             Fastest ModelInfo or None
         """
-        models = list(self._models.values())
-        
-        # Filter available models
-        models = [m for m in models if m.is_available]
-        
-        # Filter by capabilities
-        if required_capabilities:
-            for capability in required_capabilities:
-                filtered = self.find_models_by_capability(capability)
-                models = [m for m in models if m in filtered]
-        
-        if not models:
-            return None
-        
-        # Heuristic: smaller models are generally faster
-        # Priority: haiku > small > medium > large
-        speed_priority = {
-            'haiku': 0,
-            'small': 1,
-            'mini': 1,
-            'turbo': 2,
-            'medium': 3,
-            'large': 4,
-            'opus': 5,
-            'ultra': 6,
-        }
-        
-        def get_speed_score(model: ModelInfo) -> int:
-            name_lower = model.model_name.lower()
-            for key, score in speed_priority.items():
-                if key in name_lower:
-                    return score
-            return 3  # Default to medium
-        
-        models.sort(key=get_speed_score)
-        return models[0]
+        mask = capability_mask(required_capabilities) if required_capabilities else 0
+        
+        # Speed index is sorted fastest first
+        for model_id in self._by_speed:
+            model = self._models[model_id]
+            if model.is_available and (model._cap_bits & mask) == mask:
+                return model
+        return None
     
     async def health_check(self, model_id: str) -> bool:
         """
@@ -321,26 +634,9 @@ class ModelRegistry:
                 )
                 return True
             
-            # Perform health check
-            is_healthy = await provider.validate_config()
-            
-            # Update model status
-            model.is_available = is_healthy
-            model.last_health_check = datetime.utcnow()
-            
-            if is_healthy:
-                model.health_check_failures = 0
-            else:
-                model.health_check_failures += 1
-                
-                # Mark as unavailable after 3 consecutive failures
-                if model.health_check_failures >= 3:
-                    model.is_available = False
-                    logger.warning(
-                        f"Model {model_id} marked as unavailable after "
-                        f"{model.health_check_failures} failures"
-                    )
-            
+            # Perform health check (shared by models on the same credentials)
+            is_healthy = await self._probe_provider(model.provider, provider)
+            self._record_health(model_id, is_healthy)
             return is_healthy
             
         except Exception as e:
@@ -348,22 +644,166 @@ class ModelRegistry:
             model.health_check_failures += 1
             return False
     
+    def _record_health(self, model_id: str, is_healthy: bool):
+        """
+        Apply a health check outcome to a model's status
+        
+        Args:
+            model_id: Model identifier
+            is_healthy: Result of the provider probe
+        """
+        model = self._models[model_id]
+        model.is_available = is_healthy
+        model.last_health_check = time.monotonic()
+        
+        if is_healthy:
+            model.health_check_failures = 0
+        else:
+            model.health_check_failures += 1
+            
+            # Mark as unavailable after 3 consecutive failures
+            if model.health_check_failures >= 3:
+                model.is_available = False
+                logger.warning(
+                    f"Model {model_id} marked as unavailable after "
+                    f"{model.health_check_failures} failures"
+                )
+    
+    async def _probe_provider(
+        self,
+        provider_type: ModelProvider,
+        provider: BaseModelProvider
+    ) -> bool:
+        """
+        Validate a provider, coalescing probes for the same credentials
+        
+        A fresh cached result is returned directly; otherwise concurrent
+        callers share a single in-flight probe.
+        
+        Args:
+            provider_type: Model provider
+            provider: Provider instance to validate
+            
+        Returns:
+            True if the provider is reachable
+        """
+        key = (
+            provider_type,
+            hashlib.sha256((provider.config.api_key or "").encode()).hexdigest(),
+        )
+        
+        cached = self._probe_cache.get(key)
+        if cached and time.monotonic() - cached[0] < PROBE_CACHE_TTL:
+            return cached[1]
+        
+        task = self._probe_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_probe(key, provider))
+            self._probe_inflight[key] = task
+            task.add_done_callback(lambda _: self._probe_inflight.pop(key, None))
+        
+        # Shield so one cancelled waiter does not cancel the shared probe
+        return await asyncio.shield(task)
+    
+    async def _run_probe(
+        self,
+        key: Tuple[ModelProvider, str],
+        provider: BaseModelProvider
+    ) -> bool:
+        """Issue one probe within the provider's budget and cache the result"""
+        provider_type = key[0]
+        async with self._get_provider_semaphore(provider_type):
+            await self._throttle_probe(provider_type)
+            is_healthy = await provider.validate_config()
+        
+        self._probe_cache[key] = (time.monotonic(), is_healthy)
+        return is_healthy
+    
+    def _get_provider_semaphore(self, provider: ModelProvider) -> asyncio.Semaphore:
+        """
+        Get the semaphore bounding concurrent probes for a provider
+        
+        Args:
+            provider: Model provider
+            
+        Returns:
+            Semaphore sized from the provider profile
+        """
+        semaphore = self._provider_semaphores.get(provider)
+        if semaphore is None:
+            profile = PROVIDER_PROFILES.get(provider, DEFAULT_PROVIDER_PROFILE)
+            semaphore = asyncio.Semaphore(profile['max_concurrency'])
+            self._provider_semaphores[provider] = semaphore
+        return semaphore
+    
+    async def _throttle_probe(self, provider: ModelProvider):
+        """
+        Wait until a probe can be issued without exceeding the provider's
+        requests-per-minute budget
+        
+        Args:
+            provider: Model provider
+        """
+        profile = PROVIDER_PROFILES.get(provider, DEFAULT_PROVIDER_PROFILE)
+        rpm = profile['requests_per_minute']
+        if not rpm:
+            return
+        
+        window = self._probe_times[provider]
+        while True:
+            now = time.monotonic()
+            while window and now - window[0] >= 60.0:
+                window.popleft()
+            if len(window) < rpm:
+                window.append(now)
+                return
+            await asyncio.sleep(60.0 - (now - window[0]))
+    
     async def health_check_all(self):
-        """Perform health check on all models"""
+        """
+        Perform health check on all models
+        
+        Models share their provider's endpoint and credentials, so one
+        probe is issued per provider and its outcome applied to every
+        model of that provider.
+        """
         logger.info("Starting health check for all models")
         
-        tasks = [
-            self.health_check(model_id)
-            for model_id in self._models.keys()
+        groups = [
+            (provider_type, provider, list(self._by_provider.get(provider_type, ())))
+            for provider_type, provider in self._providers.items()
         ]
+        groups = [group for group in groups if group[2]]
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(self._probe_provider(provider_type, provider)
+              for provider_type, provider, _ in groups),
+            return_exceptions=True
+        )
         
-        healthy_count = sum(1 for r in results if r is True)
-        total_count = len(results)
+        healthy_count = 0
+        for (provider_type, _, model_ids), result in zip(groups, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Health check failed for {provider_type.value}: {result}")
+                for model_id in model_ids:
+                    self._models[model_id].health_check_failures += 1
+                continue
+            
+            for model_id in model_ids:
+                self._record_health(model_id, result)
+            if result:
+                healthy_count += len(model_ids)
+        
+        # Models whose provider has no instance are skipped (as in health_check)
+        skipped_count = sum(
+            len(model_ids) for provider_type, model_ids in self._by_provider.items()
+            if provider_type not in self._providers
+        )
+        total_count = len(self._models)
         
         logger.info(
             f"Health check complete: {healthy_count}/{total_count} models healthy"
+            f" ({skipped_count} skipped, {len(groups)} provider probes)"
         )
     
     async def start_health_monitoring(self):
@@ -405,22 +845,26 @@ class ModelRegistry:
             Dictionary with statistics
         """
         total_models = len(self._models)
-        available_models = sum(1 for m in self._models.values() if m.is_available)
+        available_models = self._available_count
+        providers = {
+            name: counts.copy() for name, counts in self._provider_counts.items()
+        }
         
-        providers = {}
-        for model in self._models.values():
-            provider_name = model.provider.value
-            if provider_name not in providers:
-                providers[provider_name] = {'total': 0, 'available': 0}
-            providers[provider_name]['total'] += 1
-            if model.is_available:
-                providers[provider_name]['available'] += 1
+        last_checked = max(
+            (m for m in self._models.values() if m.last_health_check is not None),
+            key=lambda m: m.last_health_check,
+            default=None
+        )
         
         return {
             'total_models': total_models,
             'available_models': available_models,
             'unavailable_models': total_models - available_models,
             'providers': providers,
+            'last_health_check': (
+                last_checked.last_health_check_at.isoformat()
+                if last_checked else None
+            ),
             'health_check_interval': self._health_check_interval,
             'monitoring_active': self._health_check_task is not None
         }
@@ -444,16 +888,14 @@ def get_registry() -> ModelRegistry:
     return _registry
 
 
-def _initialize_default_models():
-    """Initialize registry with default models"""
-    registry = get_registry()
-    
+# Default models: (provider, model_name, display_name, capabilities, tags)
+_DEFAULT_MODELS: Tuple[
+    Tuple[ModelProvider, str, str, Dict[str, Any], FrozenSet[str]], ...
+] = (
     # OpenAI Models
-    registry.register_model(
-        provider=ModelProvider.OPENAI,
-        model_name="gpt-4-turbo-preview",
-        display_name="GPT-4 Turbo",
-        capabilities=ModelCapabilities(
+    (
+        ModelProvider.OPENAI, "gpt-4-turbo-preview", "GPT-4 Turbo",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=False,
@@ -463,14 +905,11 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.01,
             cost_per_1k_output_tokens=0.03,
         ),
-        tags={'openai', 'gpt4', 'large', 'premium'}
-    )
-    
-    registry.register_model(
-        provider=ModelProvider.OPENAI,
-        model_name="gpt-4",
-        display_name="GPT-4",
-        capabilities=ModelCapabilities(
+        frozenset({'openai', 'gpt4', 'large', 'premium'}),
+    ),
+    (
+        ModelProvider.OPENAI, "gpt-4", "GPT-4",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=False,
@@ -480,14 +919,11 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.03,
             cost_per_1k_output_tokens=0.06,
         ),
-        tags={'openai', 'gpt4', 'large', 'premium'}
-    )
-    
-    registry.register_model(
-        provider=ModelProvider.OPENAI,
-        model_name="gpt-3.5-turbo",
-        display_name="GPT-3.5 Turbo",
-        capabilities=ModelCapabilities(
+        frozenset({'openai', 'gpt4', 'large', 'premium'}),
+    ),
+    (
+        ModelProvider.OPENAI, "gpt-3.5-turbo", "GPT-3.5 Turbo",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=False,
@@ -497,15 +933,12 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.0005,
             cost_per_1k_output_tokens=0.0015,
         ),
-        tags={'openai', 'gpt35', 'fast', 'affordable'}
-    )
-    
+        frozenset({'openai', 'gpt35', 'fast', 'affordable'}),
+    ),
     # Anthropic Models
-    registry.register_model(
-        provider=ModelProvider.ANTHROPIC,
-        model_name="claude-3-opus-20240229",
-        display_name="Claude 3 Opus",
-        capabilities=ModelCapabilities(
+    (
+        ModelProvider.ANTHROPIC, "claude-3-opus-20240229", "Claude 3 Opus",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=True,
@@ -515,14 +948,11 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.015,
             cost_per_1k_output_tokens=0.075,
         ),
-        tags={'anthropic', 'claude3', 'large', 'premium', 'vision'}
-    )
-    
-    registry.register_model(
-        provider=ModelProvider.ANTHROPIC,
-        model_name="claude-3-sonnet-20240229",
-        display_name="Claude 3 Sonnet",
-        capabilities=ModelCapabilities(
+        frozenset({'anthropic', 'claude3', 'large', 'premium', 'vision'}),
+    ),
+    (
+        ModelProvider.ANTHROPIC, "claude-3-sonnet-20240229", "Claude 3 Sonnet",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=True,
@@ -532,14 +962,11 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.003,
             cost_per_1k_output_tokens=0.015,
         ),
-        tags={'anthropic', 'claude3', 'medium', 'balanced', 'vision'}
-    )
-    
-    registry.register_model(
-        provider=ModelProvider.ANTHROPIC,
-        model_name="claude-3-haiku-20240307",
-        display_name="Claude 3 Haiku",
-        capabilities=ModelCapabilities(
+        frozenset({'anthropic', 'claude3', 'medium', 'balanced', 'vision'}),
+    ),
+    (
+        ModelProvider.ANTHROPIC, "claude-3-haiku-20240307", "Claude 3 Haiku",
+        dict(
             supports_streaming=True,
             supports_function_calling=True,
             supports_vision=True,
@@ -549,11 +976,26 @@ def _initialize_default_models():
             cost_per_1k_input_tokens=0.00025,
             cost_per_1k_output_tokens=0.00125,
         ),
-        tags={'anthropic', 'claude3', 'small', 'fast', 'affordable', 'vision'}
-    )
+        frozenset({'anthropic', 'claude3', 'small', 'fast', 'affordable', 'vision'}),
+    ),
+)
+
+
+def _initialize_default_models():
+    """Initialize registry with default models"""
+    registry = get_registry()
+    
+    for provider, model_name, display_name, caps, tags in _DEFAULT_MODELS:
+        registry.register_model(
+            provider=provider,
+            model_name=model_name,
+            display_name=display_name,
+            capabilities=ModelCapabilities(**caps),
+            tags=tags
+        )
     
     logger.info("Default models initialized in registry")
 
 
 # Export
-__all__ = ["ModelRegistry", "ModelInfo", "get_registry"]
+__all__ = ["ModelRegistry", "ModelInfo", "capability_mask", "get_registry"]
@@ -1,4 +1,4 @@
-a"""
+"""
 Intelligent Model Router
 
 Routes requests to the optimal model based on:
@@ -9,11 +9,20 @@ Routes requests to the optimal model based on:
 - Automatic failover
 """
 
+import asyncio
+import functools
+import itertools
 import logging
-from typing import List, Dict, Any, Optional, AsyncIterator
+import operator
+from collections import defaultdict, deque
+from typing import (
+    Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple,
+    Union
+)
 from enum import Enum
 from dataclasses import dataclass
 import time
+import weakref
 
 from app.models.base import (
     BaseModelProvider,
@@ -22,11 +31,118 @@ from app.models.base import (
     ModelResponse,
     StreamChunk,
     ModelProviderFactory,
+    _current_loop,
+)
+from app.models.registry import (
+    ModelRegistry,
+    ModelInfo,
+    capability_mask,
+    get_registry,
 )
-from app.models.registry import ModelRegistry, ModelInfo, get_registry
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached _filter_models results per registry version
+_FILTER_CACHE_MAX_SIZE = 1024
+
+# Filter predicates in RoutingContext "shape" order: preferred providers,
+# excluded providers, min context length, max cost, required capabilities
+_SHAPE_PREDICATES = (
+    "m.provider in preferred",
+    "m.provider not in excluded",
+    "m.capabilities.max_context_length >= min_context_length",
+    "m.capabilities._total_cost / 2 <= max_cost",
+    "(m._cap_bits & required_mask) == required_mask",
+)
+
+# Generate a specialized filter for a context shape once it has been
+# filtered this many times
+_SPECIALIZE_AFTER = 8
+
+# Circuit breaker: once a model has N >= threshold consecutive failures
+# it is skipped for base * 2**(N - threshold) seconds, capped at the max
+_CIRCUIT_FAILURE_THRESHOLD = 3
+_CIRCUIT_BASE_COOLDOWN = 1.0
+_CIRCUIT_MAX_COOLDOWN = 300.0
+
+# Recent request latencies kept per model; p95 is computed from them
+# when stats are read
+_LATENCY_WINDOW = 100
+
+# Default number of requests sent to a provider in one batch
+DEFAULT_MAX_BATCH_SIZE = 16
+
+# Selector sort keys, precomputed on ModelInfo at registration
+_by_cost = operator.attrgetter('_cost_sum')
+_by_quality = operator.attrgetter('_quality_tier')
+_by_balance = operator.attrgetter('_balance_score')
+
+
+# Provider config builders: (model_name, settings) -> ModelConfig.
+# Add an entry here to make a provider routable.
+_CONFIG_BUILDERS: Dict[ModelProvider, Callable[[str, Any], ModelConfig]] = {
+    ModelProvider.OPENAI: lambda model_name, settings: ModelConfig(
+        provider=ModelProvider.OPENAI,
+        model_name=model_name,
+        api_key=settings.openai_api_key,
+        organization_id=settings.openai_organization_id,
+    ),
+    ModelProvider.ANTHROPIC: lambda model_name, settings: ModelConfig(
+        provider=ModelProvider.ANTHROPIC,
+        model_name=model_name,
+        api_key=settings.anthropic_api_key,
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _build_config(provider: ModelProvider, model_name: str) -> ModelConfig:
+    """
+    Build the provider config for a model, reading credentials once
+    
+    Args:
+        provider: Model provider
+        model_name: Model identifier
+        
+    Returns:
+        ModelConfig for the model
+    """
+    builder = _CONFIG_BUILDERS.get(provider)
+    if builder is None:
+        raise ValueError(f"Provider {provider} not yet implemented")
+    
+    # Note: In production, API keys should come from secure storage
+    from app.config import settings
+    
+    return builder(model_name, settings)
+
+
+def _compile_shape_filter(shape: Tuple[bool, ...]) -> Callable[..., List[ModelInfo]]:
+    """
+    Generate a filter that evaluates only the predicates a shape uses
+    
+    The generated source is assembled from the fixed _SHAPE_PREDICATES
+    fragments; context values are passed as arguments, never inlined.
+    
+    Args:
+        shape: One flag per _SHAPE_PREDICATES entry
+        
+    Returns:
+        Function (models, preferred, excluded, min_context_length,
+        max_cost, required_mask) -> list of matching models
+    """
+    conditions = [
+        predicate for predicate, enabled in zip(_SHAPE_PREDICATES, shape) if enabled
+    ]
+    source = (
+        "def _filter(models, preferred, excluded, min_context_length, "
+        "max_cost, required_mask):\n"
+        f"    return [m for m in models if {' and '.join(conditions) or 'True'}]\n"
+    )
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<router filter {shape}>", "exec"), namespace)
+    return namespace["_filter"]
+
 
 class RoutingStrategy(str, Enum):
     """Model routing strategies"""
@@ -38,7 +154,7 @@ class RoutingStrategy(str, Enum):
     MANUAL = "manual"  # User specifies model
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingContext:
     """Context for routing decisions"""
     strategy: RoutingStrategy = RoutingStrategy.BALANCED
@@ -48,6 +164,7 @@ class RoutingContext:
     preferred_providers: Optional[List[ModelProvider]] = None
     excluded_providers: Optional[List[ModelProvider]] = None
     manual_model: Optional[str] = None  # For manual strategy
+    hedge_after_ms: Optional[float] = None  # Race first fallback after this delay
     
     def __post_init__(self):
         if self.required_capabilities is None:
@@ -62,19 +179,79 @@ class ModelRouter:
     requirements, and current model availability.
     """
     
-    def __init__(self, registry: Optional[ModelRegistry] = None):
+    def __init__(self, registry: Optional[ModelRegistry] = None, prewarm: bool = True):
         """
         Initialize model router
         
         Args:
             registry: Model registry (uses global if not provided)
+            prewarm: Build provider configs for all registered models up front
         """
         self.registry = registry or get_registry()
-        self._round_robin_index = 0
-        self._provider_cache: Dict[str, BaseModelProvider] = {}
+        
+        # Round-robin position per filtered pool (keyed and capped like
+        # _filter_cache), so contexts with different candidate sets don't
+        # skew each other
+        self._rr_counters: Dict[tuple, Iterator[int]] = {}
+        
+        # Provider instances per event loop (None = no running loop), since
+        # providers hold loop-bound HTTP sessions
+        self._provider_caches: Dict[Optional[int], Dict[str, BaseModelProvider]] = {}
+        
+        # Filtered candidates per context signature, valid for one
+        # registry version
+        self._filter_cache: Dict[tuple, List[ModelInfo]] = {}
+        self._frontier_cache: Dict[tuple, Tuple[ModelInfo, ...]] = {}
+        self._filter_cache_version = self.registry.version
+        
+        # Per-model health keyed by provider:model; open_until is on the
+        # time.monotonic() clock, last_fail_ts is wall-clock time
+        self._provider_health: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=_LATENCY_WINDOW)
+        )
+        self._open_circuits: Dict[str, float] = {}
+        
+        # Specialized filters per context shape (which filters are set)
+        self._shape_counts: Dict[Tuple[bool, ...], int] = defaultdict(int)
+        self._shape_filters: Dict[Tuple[bool, ...], Callable[..., List[ModelInfo]]] = {}
+        
+        self._strategy_handlers: Dict[
+            RoutingStrategy, Callable[[RoutingContext], Optional[ModelInfo]]
+        ] = {
+            RoutingStrategy.MANUAL: self._select_manual,
+            RoutingStrategy.COST_OPTIMIZED: self._select_cost_optimized,
+            RoutingStrategy.PERFORMANCE_OPTIMIZED: self._select_performance_optimized,
+            RoutingStrategy.QUALITY_OPTIMIZED: self._select_quality_optimized,
+            RoutingStrategy.BALANCED: self._select_balanced,
+            RoutingStrategy.ROUND_ROBIN: self._select_round_robin,
+        }
+        
+        if prewarm:
+            self._prewarm()
         
         logger.info("Model router initialized")
     
+    def _prewarm(self):
+        """
+        Build and cache provider configs for every registered model
+        
+        This takes settings access off the first request for each model.
+        Provider instances are still created on first use, because the
+        factory binds them to the running event loop.
+        """
+        warmed = 0
+        for model_info in self.registry.list_models():
+            try:
+                _build_config(model_info.provider, model_info.model_name)
+                warmed += 1
+            except Exception as e:
+                logger.debug(
+                    f"Skipping prewarm for {model_info.provider.value}:"
+                    f"{model_info.model_name}: {e}"
+                )
+        logger.debug(f"Prewarmed {warmed} provider configs")
+    
     async def route(
         self,
         messages: List[Dict[str, str]],
@@ -92,7 +269,7 @@ class ModelRouter:
         Returns:
             ModelResponse from selected model
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Select model
         model_info = self._select_model(context)
@@ -105,31 +282,352 @@ class ModelRouter:
         )
         
         # Get or create provider
-        provider = await self._get_provider(model_info, context)
+        provider = self._get_provider(model_info, context)
+        fallback_models = getattr(provider.config, 'fallback_models', None) or []
+        hedged = context.hedge_after_ms is not None and bool(fallback_models)
         
-        # Try primary model
+        # Try primary model (racing the first fallback when hedging)
         try:
-            response = await provider.generate(messages, **kwargs)
+            if hedged:
+                response = await self._generate_hedged(
+                    messages, model_info, provider, fallback_models[0], context, **kwargs
+                )
+            else:
+                response = await self._generate_tracked(
+                    model_info, provider, messages, **kwargs
+                )
             response.metadata['routing_strategy'] = context.strategy.value
-            response.metadata['selection_time_ms'] = (time.time() - start_time) * 1000
+            response.metadata['selection_time_ms'] = (time.perf_counter_ns() - start_ns) / 1_000_000
             return response
             
         except Exception as e:
             logger.error(f"Primary model failed: {e}")
             
+            # Move the rotation past the failed model so its successor
+            # doesn't absorb both its own and the failed model's share
+            if context.strategy == RoutingStrategy.ROUND_ROBIN:
+                self._next_rr_position(self._filter_key(context))
+            
+            # The hedge already tried the first fallback
+            if hedged:
+                fallback_models = fallback_models[1:]
+            
             # Try fallback if available
-            if hasattr(provider.config, 'fallback_models') and provider.config.fallback_models:
+            if fallback_models:
                 logger.info("Attempting fallback models")
                 return await self._try_fallback(
                     messages,
-                    provider.config.fallback_models,
+                    fallback_models,
                     context,
                     **kwargs
                 )
             
             raise
     
-    async def route_stream(
+    async def _generate_tracked(
+        self,
+        model_info: ModelInfo,
+        provider: BaseModelProvider,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> ModelResponse:
+        """
+        Generate with a provider, recording the outcome in the model's health
+        
+        Args:
+            model_info: Model the provider serves
+            provider: Provider instance
+            messages: Messages to send
+            **kwargs: Generation parameters
+            
+        Returns:
+            ModelResponse from the provider
+        """
+        start_ns = time.perf_counter_ns()
+        try:
+            response = await provider.generate(messages, **kwargs)
+        except Exception:
+            self._record_failure(model_info)
+            raise
+        self._record_success(model_info, (time.perf_counter_ns() - start_ns) / 1_000_000)
+        return response
+    
+    def _health(self, model_id: str) -> Dict[str, Any]:
+        """Health record for a model, created on first use"""
+        health = self._provider_health.get(model_id)
+        if health is None:
+            health = self._provider_health[model_id] = {
+                'failures': 0,
+                'last_fail_ts': None,
+                'open_until': 0.0,
+            }
+        return health
+    
+    def _record_failure(self, model_info: ModelInfo):
+        """Count a failure; open the model's circuit once it hits the threshold"""
+        model_id = model_info._model_id
+        health = self._health(model_id)
+        health['failures'] += 1
+        health['last_fail_ts'] = time.time()
+        
+        # A single transient error shouldn't take a model out of rotation
+        excess = health['failures'] - _CIRCUIT_FAILURE_THRESHOLD
+        if excess < 0:
+            return
+        
+        cooldown = min(
+            _CIRCUIT_BASE_COOLDOWN * 2 ** min(excess, 16),
+            _CIRCUIT_MAX_COOLDOWN
+        )
+        health['open_until'] = time.monotonic() + cooldown
+        self._open_circuits[model_id] = health['open_until']
+        
+        logger.warning(
+            f"Skipping {model_id} for {cooldown:.0f}s after "
+            f"{health['failures']} consecutive failure(s)"
+        )
+    
+    def _record_success(self, model_info: ModelInfo, latency_ms: float):
+        """Close the model's circuit and record request latency"""
+        model_id = model_info._model_id
+        health = self._health(model_id)
+        if health['failures']:
+            health['failures'] = 0
+            health['open_until'] = 0.0
+            self._open_circuits.pop(model_id, None)
+        
+        self._latencies[model_id].append(latency_ms)
+    
+    def _p95_ms(self, model_id: str) -> Optional[float]:
+        """95th percentile of a model's recent latencies, if any"""
+        latencies = self._latencies.get(model_id)
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+    
+    def _is_circuit_open(self, model_id: str) -> bool:
+        """Whether a model is still cooling down after failures"""
+        open_until = self._open_circuits.get(model_id)
+        return open_until is not None and time.monotonic() < open_until
+    
+    def _without_open_circuits(self, models: List[ModelInfo]) -> List[ModelInfo]:
+        """
+        Drop models whose circuit is open
+        
+        Expired circuits are closed first, so their models get one more
+        try. If every candidate is cooling down, all are returned rather
+        than failing the request outright.
+        
+        Args:
+            models: Candidate models
+            
+        Returns:
+            Candidates that are not cooling down
+        """
+        if not self._open_circuits:
+            return models
+        
+        now = time.monotonic()
+        expired = [
+            model_id for model_id, open_until in self._open_circuits.items()
+            if open_until <= now
+        ]
+        for model_id in expired:
+            del self._open_circuits[model_id]
+        if not self._open_circuits:
+            return models
+        
+        healthy = [m for m in models if m._model_id not in self._open_circuits]
+        return healthy or models
+    
+    async def _generate_hedged(
+        self,
+        messages: List[Dict[str, str]],
+        model_info: ModelInfo,
+        provider: BaseModelProvider,
+        hedge_model_id: str,
+        context: RoutingContext,
+        **kwargs
+    ) -> ModelResponse:
+        """
+        Generate with the primary provider, hedging with a fallback model
+        
+        If the primary has not succeeded within context.hedge_after_ms
+        (or fails sooner), the same request is sent to hedge_model_id and
+        the first successful response wins. The other request is
+        cancelled so its connection is released.
+        
+        Args:
+            messages: Messages to send
+            model_info: Primary model
+            provider: Primary provider
+            hedge_model_id: Fallback model ID to race against the primary
+            context: Routing context
+            **kwargs: Generation parameters
+            
+        Returns:
+            ModelResponse from whichever request succeeded first
+            
+        Raises:
+            The primary model's error if both requests fail
+        """
+        primary = asyncio.create_task(
+            self._generate_tracked(model_info, provider, messages, **kwargs)
+        )
+        tasks = [primary]
+        hedge = None
+        
+        try:
+            await asyncio.wait(tasks, timeout=context.hedge_after_ms / 1000)
+            if primary.done() and primary.exception() is None:
+                return primary.result()
+            
+            # Primary is slow or already failed: fire the hedge
+            hedge_info = self.registry.get_model(hedge_model_id)
+            if (
+                hedge_info and hedge_info.is_available
+                and not self._is_circuit_open(hedge_model_id)
+            ):
+                logger.info(f"Hedging with fallback model: {hedge_model_id}")
+                hedge_provider = self._get_provider(hedge_info, context)
+                hedge = asyncio.create_task(
+                    self._generate_tracked(hedge_info, hedge_provider, messages, **kwargs)
+                )
+                tasks.append(hedge)
+            
+            pending = {task for task in tasks if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        response = task.result()
+                        if task is hedge:
+                            response.metadata['is_fallback'] = True
+                            response.metadata['fallback_model'] = hedge_model_id
+                            response.metadata['hedged'] = True
+                        return response
+            
+            if hedge is not None:
+                logger.warning(f"Hedge {hedge_model_id} failed: {hedge.exception()}")
+            
+            # Both failed: re-raise the primary error
+            return primary.result()
+            
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def route_batched(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        context: RoutingContext,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> List[Union[ModelResponse, BaseException]]:
+        """
+        Route several independent requests sharing one routing context
+        
+        The model is selected once for the whole batch. Requests are sent
+        in chunks of max_batch_size, through provider.generate_batch when
+        the provider has it, otherwise as concurrent generate() calls.
+        Outcomes feed the same per-model health as route(); a chunk whose
+        model's circuit is open when it is dispatched goes to a freshly
+        selected model instead. Failed requests are not retried on
+        fallback models.
+        
+        Args:
+            messages_list: One message list per request
+            context: Routing context shared by all requests
+            max_batch_size: Maximum requests per provider batch
+            return_exceptions: Return per-request errors in place of
+                responses instead of raising the first one
+            **kwargs: Additional generation parameters
+            
+        Returns:
+            Responses in the same order as messages_list
+        """
+        if not messages_list:
+            return []
+        
+        start_ns = time.perf_counter_ns()
+        
+        model_info = self._select_model(context)
+        if not model_info:
+            raise ValueError("No suitable model found for request")
+        
+        logger.info(
+            f"Routed batch of {len(messages_list)} to "
+            f"{model_info.provider.value}:{model_info.model_name} "
+            f"(strategy: {context.strategy})"
+        )
+        
+        selected = model_info
+        
+        def chunk_model() -> ModelInfo:
+            # Re-check at dispatch: route() or an earlier chunk may have
+            # opened the circuit. Keep the model if nothing healthier exists.
+            nonlocal selected
+            if self._is_circuit_open(selected._model_id):
+                replacement = self._select_model(context)
+                if replacement is not None and not self._is_circuit_open(
+                    replacement._model_id
+                ):
+                    logger.info(
+                        f"Batch chunk moved from {selected._model_id} to "
+                        f"{replacement._model_id}: circuit open"
+                    )
+                    selected = replacement
+            return selected
+        
+        async def run_chunk(chunk: List[List[Dict[str, str]]]) -> List[Any]:
+            chunk_info = chunk_model()
+            provider = self._get_provider(chunk_info, context)
+            generate_batch = getattr(provider, 'generate_batch', None)
+            if generate_batch is not None:
+                # One health record per provider call
+                chunk_start_ns = time.perf_counter_ns()
+                try:
+                    results = list(await generate_batch(chunk, **kwargs))
+                except Exception as e:
+                    self._record_failure(chunk_info)
+                    if not return_exceptions:
+                        raise
+                    return [e] * len(chunk)
+                self._record_success(
+                    chunk_info, (time.perf_counter_ns() - chunk_start_ns) / 1_000_000
+                )
+                return results
+            return await asyncio.gather(
+                *(
+                    self._generate_tracked(chunk_info, provider, messages, **kwargs)
+                    for messages in chunk
+                ),
+                return_exceptions=return_exceptions
+            )
+        
+        chunks = await asyncio.gather(*(
+            run_chunk(messages_list[i:i + max_batch_size])
+            for i in range(0, len(messages_list), max_batch_size)
+        ))
+        
+        selection_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        responses = []
+        for chunk in chunks:
+            for response in chunk:
+                if not isinstance(response, BaseException):
+                    response.metadata['routing_strategy'] = context.strategy.value
+                    response.metadata['selection_time_ms'] = selection_time_ms
+                responses.append(response)
+        
+        return responses
+    
+    def route_stream(
         self,
         messages: List[Dict[str, str]],
         context: RoutingContext,
@@ -138,13 +636,17 @@ class ModelRouter:
         """
         Route streaming request to optimal model
         
+        The provider's stream is returned as-is, so chunks reach the
+        caller without passing through a router generator. Selection
+        errors are raised by this call rather than on first iteration.
+        
         Args:
             messages: Messages to send to model
             context: Routing context
             **kwargs: Additional generation parameters
             
-        Yields:
-            StreamChunk objects from selected model
+        Returns:
+            Async iterator of StreamChunk objects from selected model
         """
         # Select model
         model_info = self._select_model(context)
@@ -162,11 +664,10 @@ class ModelRouter:
         )
         
         # Get or create provider
-        provider = await self._get_provider(model_info, context)
+        provider = self._get_provider(model_info, context)
         
-        # Stream from provider
-        async for chunk in provider.generate_stream(messages, **kwargs):
-            yield chunk
+        # Stream directly from provider
+        return provider.generate_stream(messages, **kwargs)
     
     def _select_model(self, context: RoutingContext) -> Optional[ModelInfo]:
         """
@@ -178,20 +679,10 @@ class ModelRouter:
         Returns:
             Selected ModelInfo or None
         """
-        if context.strategy == RoutingStrategy.MANUAL:
-            return self._select_manual(context)
-        elif context.strategy == RoutingStrategy.COST_OPTIMIZED:
-            return self._select_cost_optimized(context)
-        elif context.strategy == RoutingStrategy.PERFORMANCE_OPTIMIZED:
-            return self._select_performance_optimized(context)
-        elif context.strategy == RoutingStrategy.QUALITY_OPTIMIZED:
-            return self._select_quality_optimized(context)
-        elif context.strategy == RoutingStrategy.BALANCED:
-            return self._select_balanced(context)
-        elif context.strategy == RoutingStrategy.ROUND_ROBIN:
-            return self._select_round_robin(context)
-        else:
+        handler = self._strategy_handlers.get(context.strategy)
+        if handler is None:
             raise ValueError(f"Unknown routing strategy: {context.strategy}")
+        return handler(context)
     
     def _select_manual(self, context: RoutingContext) -> Optional[ModelInfo]:
         """Select manually specified model"""
@@ -202,20 +693,13 @@ class ModelRouter:
     
     def _select_cost_optimized(self, context: RoutingContext) -> Optional[ModelInfo]:
         """Select cheapest model that meets requirements"""
-        models = self._filter_models(context)
+        models = self._frontier_models(context)
         
         if not models:
             return None
         
-        # Sort by cost (cheapest first)
-        models.sort(
-            key=lambda m: (
-                m.capabilities.cost_per_1k_input_tokens +
-                m.capabilities.cost_per_1k_output_tokens
-            )
-        )
-        
-        return models[0]
+        # Cheapest combined input + output cost
+        return min(models, key=_by_cost)
     
     def _select_performance_optimized(
         self,
@@ -235,158 +719,207 @@ class ModelRouter:
         context: RoutingContext
     ) -> Optional[ModelInfo]:
         """Select highest quality model that meets requirements"""
-        models = self._filter_models(context)
+        models = self._frontier_models(context)
         
         if not models:
             return None
         
-        # Heuristic: more expensive models are generally higher quality
-        # Priority: opus > large > medium > small
-        quality_priority = {
-            'opus': 0,
-            'ultra': 0,
-            'large': 1,
-            'turbo': 2,
-            'medium': 3,
-            'small': 4,
-            'mini': 5,
-            'haiku': 5,
-        }
-        
-        def get_quality_score(model: ModelInfo) -> int:
-            name_lower = model.model_name.lower()
-            for key, score in quality_priority.items():
-                if key in name_lower:
-                    return score
-            return 3  # Default to medium
-        
-        models.sort(key=get_quality_score)
-        return models[0]
+        # Lowest quality tier first (see registry.QUALITY_PRIORITY)
+        return min(models, key=_by_quality)
     
     def _select_balanced(self, context: RoutingContext) -> Optional[ModelInfo]:
         """Select model with best cost/performance balance"""
-        models = self._filter_models(context)
+        models = self._frontier_models(context)
         
         if not models:
             return None
         
-        # Calculate balance score (lower is better)
-        def balance_score(model: ModelInfo) -> float:
-            # Normalize cost (0-1 scale, assuming max $0.1 per 1k tokens)
-            avg_cost = (
-                model.capabilities.cost_per_1k_input_tokens +
-                model.capabilities.cost_per_1k_output_tokens
-            ) / 2
-            cost_score = min(avg_cost / 0.1, 1.0)
-            
-            # Normalize quality (0-1 scale based on model tier)
-            quality_map = {
-                'opus': 1.0, 'ultra': 1.0, 'large': 0.8,
-                'turbo': 0.7, 'medium': 0.6, 'small': 0.4,
-                'mini': 0.3, 'haiku': 0.3
-            }
-            name_lower = model.model_name.lower()
-            quality_score = 0.5  # Default
-            for key, score in quality_map.items():
-                if key in name_lower:
-                    quality_score = score
-                    break
-            
-            # Balance: 60% quality, 40% cost
-            return (0.4 * cost_score) + (0.6 * (1 - quality_score))
-        
-        models.sort(key=balance_score)
-        return models[0]
+        # Lowest balance score first (60% quality, 40% cost)
+        return min(models, key=_by_balance)
     
     def _select_round_robin(self, context: RoutingContext) -> Optional[ModelInfo]:
         """Select model using round-robin load balancing"""
-        models = self._filter_models(context)
+        key = self._filter_key(context)
+        models = self._filter_models(context, key)
         
         if not models:
             return None
         
-        # Select next model in rotation
-        selected = models[self._round_robin_index % len(models)]
-        self._round_robin_index += 1
+        # Select next model in this pool's rotation
+        return models[self._next_rr_position(key) % len(models)]
+    
+    def _next_rr_position(self, key: tuple) -> int:
+        """Advance the round-robin counter of a candidate pool"""
+        counter = self._rr_counters.get(key)
+        if counter is None:
+            if len(self._rr_counters) >= _FILTER_CACHE_MAX_SIZE:
+                self._rr_counters.clear()
+            counter = self._rr_counters[key] = itertools.count()
+        return next(counter)
+    
+    def _filter_key(self, context: RoutingContext) -> tuple:
+        """
+        Hashable signature of the context fields that affect filtering
         
-        return selected
+        Args:
+            context: Routing context
+            
+        Returns:
+            Tuple usable as a cache key
+        """
+        return (
+            tuple(sorted(context.preferred_providers or ())),
+            tuple(sorted(context.excluded_providers or ())),
+            context.min_context_length,
+            context.max_cost_per_1k_tokens,
+            tuple(sorted(set(context.required_capabilities))),
+        )
     
-    def _filter_models(self, context: RoutingContext) -> List[ModelInfo]:
+    def _filter_models(
+        self,
+        context: RoutingContext,
+        key: Optional[tuple] = None
+    ) -> List[ModelInfo]:
         """
         Filter models based on context requirements
         
+        Results are cached per context signature until the registry
+        version changes; callers must not mutate the returned list.
+        
+        Args:
+            context: Routing context
+            key: Precomputed _filter_key(context), if the caller has one
+            
+        Returns:
+            List of suitable models
+        """
+        self._check_cache_version()
+        
+        if key is None:
+            key = self._filter_key(context)
+        models = self._filter_cache.get(key)
+        if models is None:
+            models = self._compute_filtered_models(context)
+            if len(self._filter_cache) >= _FILTER_CACHE_MAX_SIZE:
+                self._filter_cache.clear()
+            self._filter_cache[key] = models
+        
+        return self._without_open_circuits(models)
+    
+    def _frontier_models(self, context: RoutingContext) -> Tuple[ModelInfo, ...]:
+        """
+        Cost/quality Pareto frontier of the models suitable for context
+        
+        The frontier is taken after filtering, since a dominated model
+        may be the only one meeting the context's requirements.
+        
+        Args:
+            context: Routing context
+            
+        Returns:
+            Non-dominated suitable models, cheapest first
+        """
+        self._check_cache_version()
+        
+        key = self._filter_key(context)
+        
+        # Circuit state changes independently of the registry version,
+        # so the frontier is only cached while every circuit is closed
+        models = self._filter_models(context, key)
+        if self._open_circuits:
+            return self.registry.pareto_frontier(models)
+        
+        frontier = self._frontier_cache.get(key)
+        if frontier is None:
+            frontier = self.registry.pareto_frontier(models)
+            if len(self._frontier_cache) >= _FILTER_CACHE_MAX_SIZE:
+                self._frontier_cache.clear()
+            self._frontier_cache[key] = frontier
+        
+        return frontier
+    
+    def _check_cache_version(self):
+        """Drop filter results computed against an older registry version"""
+        if self._filter_cache_version != self.registry.version:
+            self._filter_cache.clear()
+            self._frontier_cache.clear()
+            self._filter_cache_version = self.registry.version
+    
+    def _compute_filtered_models(self, context: RoutingContext) -> List[ModelInfo]:
+        """
+        Apply all context filters in a single pass over available models
+        
+        Context shapes seen _SPECIALIZE_AFTER times get a generated filter
+        that skips the predicates the shape doesn't use.
+        
         Args:
             context: Routing context
             
         Returns:
             List of suitable models
         """
-        # Start with all available models
-        models = self.registry.list_models(available_only=True)
-        
-        # Filter by preferred providers
-        if context.preferred_providers:
-            models = [
-                m for m in models
-                if m.provider in context.preferred_providers
-            ]
-        
-        # Filter by excluded providers
-        if context.excluded_providers:
-            models = [
-                m for m in models
-                if m.provider not in context.excluded_providers
-            ]
-        
-        # Filter by context length
-        if context.min_context_length:
-            models = [
-                m for m in models
-                if m.capabilities.max_context_length >= context.min_context_length
-            ]
-        
-        # Filter by cost
-        if context.max_cost_per_1k_tokens:
-            models = [
-                m for m in models
-                if (
-                    m.capabilities.cost_per_1k_input_tokens +
-                    m.capabilities.cost_per_1k_output_tokens
-                ) / 2 <= context.max_cost_per_1k_tokens
-            ]
-        
-        # Filter by capabilities
-        for capability in context.required_capabilities:
-            if capability == 'function_calling':
-                models = [
-                    m for m in models
-                    if m.capabilities.supports_function_calling
-                ]
-            elif capability == 'vision':
-                models = [
-                    m for m in models
-                    if m.capabilities.supports_vision
-                ]
-            elif capability == 'streaming':
-                models = [
-                    m for m in models
-                    if m.capabilities.supports_streaming
-                ]
-            elif capability == 'json_mode':
-                models = [
-                    m for m in models
-                    if m.capabilities.supports_json_mode
-                ]
+        preferred = context.preferred_providers
+        excluded = context.excluded_providers
+        min_context_length = context.min_context_length
+        max_cost = context.max_cost_per_1k_tokens
+        required_mask = capability_mask(context.required_capabilities)
+        
+        shape = (
+            bool(preferred),
+            bool(excluded),
+            bool(min_context_length),
+            bool(max_cost),
+            bool(required_mask),
+        )
+        shape_filter = self._shape_filters.get(shape)
+        if shape_filter is None:
+            self._shape_counts[shape] += 1
+            if self._shape_counts[shape] >= _SPECIALIZE_AFTER:
+                shape_filter = self._shape_filters[shape] = _compile_shape_filter(shape)
+                logger.debug(f"Specialized model filter for context shape {shape}")
+        if shape_filter is not None:
+            return shape_filter(
+                self.registry.list_models(available_only=True),
+                preferred,
+                excluded,
+                min_context_length,
+                max_cost,
+                required_mask,
+            )
+        
+        models = []
+        for m in self.registry.list_models(available_only=True):
+            caps = m.capabilities
+            
+            # Filter by preferred / excluded providers
+            if preferred and m.provider not in preferred:
+                continue
+            if excluded and m.provider in excluded:
+                continue
+            
+            # Filter by context length
+            if min_context_length and caps.max_context_length < min_context_length:
+                continue
+            
+            # Filter by cost
+            if max_cost and caps._total_cost / 2 > max_cost:
+                continue
+            
+            # Filter by capabilities
+            if (m._cap_bits & required_mask) != required_mask:
+                continue
+            
+            models.append(m)
         
         return models
     
-    async def _get_provider(
+    def _get_provider(
         self,
         model_info: ModelInfo,
         context: RoutingContext
     ) -> BaseModelProvider:
         """
-        Get or create provider instance
+        Get or create provider instance for the running event loop
         
         Args:
             model_info: Model information
@@ -395,38 +928,24 @@ class ModelRouter:
         Returns:
             Provider instance
         """
-        cache_key = f"{model_info.provider.value}:{model_info.model_name}"
-        
-        # Return cached provider if available
-        if cache_key in self._provider_cache:
-            return self._provider_cache[cache_key]
-        
-        # Create new provider
-        # Note: In production, API keys should come from secure storage
-        from app.config import settings
-        
-        # Build config based on provider
-        if model_info.provider == ModelProvider.OPENAI:
-            config = ModelConfig(
-                provider=model_info.provider,
-                model_name=model_info.model_name,
-                api_key=settings.openai_api_key,
-                organization_id=settings.openai_organization_id,
-            )
-        elif model_info.provider == ModelProvider.ANTHROPIC:
-            config = ModelConfig(
-                provider=model_info.provider,
-                model_name=model_info.model_name,
-                api_key=settings.anthropic_api_key,
-            )
-        else:
-            raise ValueError(f"Provider {model_info.provider} not yet implemented")
+        loop = _current_loop()
+        loop_id = id(loop) if loop is not None else None
         
-        # Create provider using factory
-        provider = ModelProviderFactory.create(config)
+        cache = self._provider_caches.get(loop_id)
+        if cache is None:
+            cache = self._provider_caches[loop_id] = {}
+            if loop is not None:
+                # Drop the shard once its loop is garbage collected
+                weakref.finalize(loop, self._provider_caches.pop, loop_id, None)
         
-        # Cache provider
-        self._provider_cache[cache_key] = provider
+        provider = cache.get(model_info._model_id)
+        if provider is None:
+            # Create new provider using factory
+            config = _build_config(model_info.provider, model_info.model_name)
+            provider = ModelProviderFactory.create(config)
+            
+            # Cache provider
+            cache[model_info._model_id] = provider
         
         return provider
     
@@ -461,9 +980,14 @@ class ModelRouter:
                 model_info = self.registry.get_model(model_id)
                 if not model_info or not model_info.is_available:
                     continue
+                if self._is_circuit_open(model_id):
+                    logger.info(f"Skipping fallback {model_id}: circuit open")
+                    continue
                 
-                provider = await self._get_provider(model_info, context)
-                response = await provider.generate(messages, **kwargs)
+                provider = self._get_provider(model_info, context)
+                response = await self._generate_tracked(
+                    model_info, provider, messages, **kwargs
+                )
                 
                 response.metadata['is_fallback'] = True
                 response.metadata['fallback_model'] = model_id
@@ -487,17 +1011,160 @@ class ModelRouter:
             Dictionary with routing stats
         """
         return {
-            'cached_providers': len(self._provider_cache),
-            'round_robin_index': self._round_robin_index,
+            'cached_providers': sum(map(len, list(self._provider_caches.values()))),
+            'round_robin_pools': len(self._rr_counters),
+            'open_circuits': sum(map(self._is_circuit_open, list(self._open_circuits))),
+            'provider_health': {
+                model_id: {**health, 'p95_ms': self._p95_ms(model_id)}
+                for model_id, health in self._provider_health.items()
+            },
             'registry_stats': self.registry.get_stats()
         }
     
     def clear_cache(self):
-        """Clear provider cache"""
-        self._provider_cache.clear()
+        """Clear provider, config and filter caches"""
+        self._provider_caches.clear()
+        self._filter_cache.clear()
+        self._frontier_cache.clear()
+        _build_config.cache_clear()
         logger.info("Router cache cleared")
 
 
+class BatchingRouter:
+    """
+    Micro-batching front end for ModelRouter
+    
+    Concurrent route() calls with the same routing context and generation
+    parameters are held for up to max_wait_ms (or until max_batch_size
+    requests are queued) and dispatched together through
+    ModelRouter.route_batched. Each caller still gets its own response.
+    """
+    
+    def __init__(
+        self,
+        router: Optional[ModelRouter] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = 10.0
+    ):
+        """
+        Initialize batching router
+        
+        Args:
+            router: Router to dispatch batches through (uses global if not provided)
+            max_batch_size: Flush a batch as soon as it holds this many requests
+            max_wait_ms: Maximum time a request waits for its batch to fill
+        """
+        self.router = router or get_router()
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        
+        # Open batches: key -> (context, kwargs, [(messages, future), ...])
+        self._pending: Dict[
+            tuple,
+            Tuple[RoutingContext, Dict[str, Any], List[Tuple[List[Dict[str, str]], asyncio.Future]]]
+        ] = {}
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+        self._dispatches: set = set()
+    
+    def _batch_key(self, context: RoutingContext, kwargs: Dict[str, Any]) -> tuple:
+        """Requests with equal keys are routed identically and may share a batch"""
+        return (
+            self.router._filter_key(context),
+            context.strategy,
+            context.manual_model,
+            tuple(sorted(kwargs.items())),
+        )
+    
+    async def route(
+        self,
+        messages: List[Dict[str, str]],
+        context: RoutingContext,
+        **kwargs
+    ) -> ModelResponse:
+        """
+        Route a request as part of a micro-batch
+        
+        Args:
+            messages: Messages to send to model
+            context: Routing context
+            **kwargs: Additional generation parameters
+            
+        Returns:
+            ModelResponse for this request
+        """
+        try:
+            key = self._batch_key(context, kwargs)
+            hash(key)
+        except TypeError:
+            # Unhashable generation parameters can't be grouped
+            return await self.router.route(messages, context, **kwargs)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = (context, kwargs, [])
+            self._timers[key] = loop.call_later(
+                self.max_wait_ms / 1000, self._flush, key
+            )
+        batch[2].append((messages, future))
+        
+        if len(batch[2]) >= self.max_batch_size:
+            self._flush(key)
+        
+        return await future
+    
+    def _flush(self, key: tuple):
+        """Dispatch the open batch for key, if any"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        
+        task = asyncio.ensure_future(self._dispatch(*batch))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+    
+    async def _dispatch(
+        self,
+        context: RoutingContext,
+        kwargs: Dict[str, Any],
+        items: List[Tuple[List[Dict[str, str]], asyncio.Future]]
+    ):
+        """Run one batch and resolve each caller's future"""
+        try:
+            results = await self.router.route_batched(
+                [messages for messages, _ in items],
+                context,
+                max_batch_size=self.max_batch_size,
+                return_exceptions=True,
+                **kwargs
+            )
+        except Exception as e:
+            results = [e] * len(items)
+        except BaseException:
+            # Dispatch cancelled (e.g. at shutdown): don't leave callers
+            # waiting on futures nobody will resolve
+            for _, future in items:
+                if not future.done():
+                    future.cancel()
+            raise
+        
+        for (_, future), result in zip(items, results):
+            if future.done():
+                continue  # Caller gave up
+            if isinstance(result, asyncio.CancelledError):
+                future.cancel()
+            elif isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
 # Global router instance
 _router: Optional[ModelRouter] = None
 
@@ -520,5 +1187,6 @@ __all__ = [
     "RoutingStrategy",
     "RoutingContext",
     "ModelRouter",
+    "BatchingRouter",
     "get_router",
 ]
@@ -8,6 +8,7 @@ for consistent error management across the application.
 import logging
 import traceback
 import sys
+from collections import ChainMap
 from typing import Optional, Dict, Any, Type
 from datetime import datetime
 
@@ -31,15 +32,21 @@ def log_error(
         level: Logging level (default: ERROR)
         include_traceback: Whether to include full traceback
     """
+    # Skip building context for records that would be dropped anyway
+    if not logger.isEnabledFor(level):
+        return
+    
     error_info = build_error_context(error, context)
     
     log_message = f"{error_info['error_type']}: {error_info['message']}"
     
+    # The timestamp is LogRecord.created; formatters render it via %(asctime)s.
+    # Context is copied to a plain dict (it may be a ChainMap view) for
+    # handlers that serialize it.
     extra = {
         "error_code": error_info.get("error_code"),
         "error_type": error_info["error_type"],
-        "context": error_info.get("context", {}),
-        "timestamp": error_info["timestamp"]
+        "context": dict(error_info.get("context", {})),
     }
     
     if include_traceback:
@@ -55,6 +62,8 @@ def build_error_context(
     """
     Build comprehensive error context for logging and debugging
     
+    No timestamp is included; when logged, the LogRecord carries one.
+    
     Args:
         error: The exception to build context for
         additional_context: Additional context to include
@@ -65,25 +74,27 @@ def build_error_context(
     context = {
         "error_type": type(error).__name__,
         "message": str(error),
-        "timestamp": datetime.utcnow().isoformat()
     }
     
-    # Add error code if it's an AppException
-    if isinstance(error, AppException):
-        context["error_code"] = error.error_code.value
-        context["context"] = error.context
-        if error.original_error:
-            context["original_error"] = {
-                "type": type(error.original_error).__name__,
-                "message": str(error.original_error)
-            }
+    if not isinstance(error, AppException):
+        # Fast path: plain exception
+        if additional_context:
+            context["context"] = additional_context
+        return context
+    
+    # Add error code for AppExceptions
+    context["error_code"] = error.error_code.value
+    if error.original_error:
+        context["original_error"] = {
+            "type": type(error.original_error).__name__,
+            "message": str(error.original_error)
+        }
     
-    # Add additional context
+    # Merge additional context without mutating the exception's own
     if additional_context:
-        if "context" in context:
-            context["context"].update(additional_context)
-        else:
-            context["context"] = additional_context
+        context["context"] = {**error.context, **additional_context}
+    else:
+        context["context"] = error.context
     
     return context
 
@@ -127,15 +138,14 @@ def get_error_response(
             "error_code": ErrorCode.INTERNAL_ERROR.value
         }
     
+    # Include type, timestamp and traceback in development mode only;
+    # formatting the traceback is the expensive part
     if include_details:
         response["details"] = {
             "type": type(error).__name__,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow().isoformat(),
+            "traceback": format_traceback(error)
         }
-        
-        # Include traceback in development mode
-        if include_details:
-            response["details"]["traceback"] = format_traceback(error)
     
     return response
 
@@ -227,6 +237,11 @@ class ErrorContext:
         self.reraise = reraise
         self.context = context
         self.error: Optional[Exception] = None
+        
+        # Operation plus context as a view, assembled once per manager
+        # rather than copied on every exception; context keys win, as
+        # with {"operation": operation, **context}
+        self._full_context = ChainMap(context, {"operation": operation})
     
     def __enter__(self):
         return self
@@ -235,14 +250,8 @@ class ErrorContext:
         if exc_val is not None:
             self.error = exc_val
             
-            # Add operation to context
-            full_context = {
-                "operation": self.operation,
-                **self.context
-            }
-            
             # Log the error
-            log_error(exc_val, full_context, self.log_level)
+            log_error(exc_val, self._full_context, self.log_level)
             
             # Return False to re-raise, True to suppress
             return not self.reraise
@@ -275,7 +284,7 @@ def safe_execute(
     try:
         return func(*args, **kwargs)
     except Exception as e:
-        if log_errors:
+        if log_errors and logger.isEnabledFor(logging.WARNING):
             log_error(e, context, level=logging.WARNING)
         return default
 
@@ -305,6 +314,6 @@ async def async_safe_execute(
     try:
         return await func(*args, **kwargs)
     except Exception as e:
-        if log_errors:
+        if log_errors and logger.isEnabledFor(logging.WARNING):
             log_error(e, context, level=logging.WARNING)
         return default
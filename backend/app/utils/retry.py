@@ -4,23 +4,347 @@ Retry Decorator and Utilities
 Provides decorators and utilities for retrying operations with
 exponential backoff, particularly useful for transient failures
 in database operations and external API calls.
+
+- retry / async_retry: decorators for sync and async functions
+- smart_retry: picks retry or async_retry for the decorated function
+- RetryContext: explicit retry loop for sync code (wait() blocks)
+- AsyncRetryContext: the same loop for async code; ``await wait()``
+  yields to the event loop instead of blocking it
+- retry_with_cache: retry plus a result cache for idempotent calls
+- CircuitBreaker: shared failure counter that stops all callers of a
+  failing backend for a while instead of letting each retry on its own
+- sleep_histogram: measured backoff sleeps in power-of-two buckets
 """
 
 import time
 import logging
 import functools
-from typing import Callable, Type, Tuple, Optional, Any
+import math
+import os
+import random
+import threading
+from collections import Counter, OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Callable, Type, Tuple, Optional, Any, Hashable, MutableMapping
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Backoff jitter modes: "none" sleeps the exact backoff delay, "full"
+# sleeps uniformly in [0, delay], "equal" sleeps delay/2 plus uniform
+# [0, delay/2]. Jitter spreads out callers that failed together.
+JITTER_MODES = ("none", "full", "equal")
+
+
+# Never retried, even if covered by ``exceptions`` (e.g. BaseException):
+# interrupts and task cancellation must propagate at once
+_NEVER_RETRY = (KeyboardInterrupt, SystemExit)
+_NEVER_RETRY_ASYNC = (asyncio.CancelledError, KeyboardInterrupt, SystemExit)
+
+
+# Measured backoff sleeps of retry / async_retry, counted per bucket. A
+# bucket is keyed by its upper bound in seconds; bounds double from
+# _MIN_SLEEP_BUCKET (1ms, 2ms, 4ms, ...). Sleeps that run well over
+# their bucket point at a blocked event loop or a starved thread.
+_MIN_SLEEP_BUCKET = 0.001
+sleep_histogram: Counter = Counter()
+
+
+def _record_sleep(seconds: float) -> None:
+    """Count a measured sleep in sleep_histogram"""
+    if seconds <= _MIN_SLEEP_BUCKET:
+        bucket = _MIN_SLEEP_BUCKET
+    else:
+        bucket = _MIN_SLEEP_BUCKET * 2 ** math.ceil(math.log2(seconds / _MIN_SLEEP_BUCKET))
+    sleep_histogram[bucket] += 1
+
+
+def _check_jitter(jitter: str) -> None:
+    """Raise ValueError for an unknown jitter mode"""
+    if jitter not in JITTER_MODES:
+        raise ValueError(
+            f"Unknown jitter mode {jitter!r}, expected one of {JITTER_MODES}"
+        )
+
+
+def backoff_schedule(
+    max_attempts: int,
+    delay: float,
+    backoff: float,
+    max_delay: float
+) -> Tuple[float, ...]:
+    """
+    Unjittered delays slept between attempts
+    
+    Args:
+        max_attempts: Maximum number of attempts
+        delay: Initial delay in seconds
+        backoff: Multiplier for delay after each retry
+        max_delay: Upper bound on any delay in seconds
+        
+    Returns:
+        Tuple of max_attempts - 1 delays; entry i follows attempt i + 1
+    """
+    delays = []
+    current_delay = min(delay, max_delay)
+    for _ in range(max_attempts - 1):
+        delays.append(current_delay)
+        current_delay = min(current_delay * backoff, max_delay)
+    return tuple(delays)
+
+
+def _sleep_budget(
+    sleep_for: float,
+    deadline: Optional[float],
+    start: Optional[float]
+) -> Optional[float]:
+    """
+    Clamp a sleep to the time left before the deadline
+    
+    Args:
+        sleep_for: Desired sleep in seconds
+        deadline: Total budget in seconds, or None for no deadline
+        start: time.monotonic() when the budget started
+        
+    Returns:
+        Seconds to sleep, or None if the budget is used up
+    """
+    if deadline is None:
+        return sleep_for
+    remaining = deadline - (time.monotonic() - start)
+    if remaining <= 0:
+        return None
+    return min(sleep_for, remaining)
+
+
+# Jitter draws from a per-thread random.Random, so retrying threads don't
+# contend on the lock of the module-level generator. Bumping the
+# generation makes every thread build a new one on its next draw.
+_tls = threading.local()
+_rng_seed: Optional[int] = None
+_rng_generation = 0
+
+
+def configure_rng(seed: Optional[int] = None) -> None:
+    """
+    Reseed the jitter random number generators
+    
+    With a seed, every thread draws the same reproducible sequence
+    (meant for tests). With None, each thread is seeded from the OS,
+    which is the default. If jitter ever has to be unpredictable,
+    random.SystemRandom is a drop-in replacement in _rng().
+    
+    Args:
+        seed: Seed for the per-thread generators, or None for OS seeding
+    """
+    global _rng_seed, _rng_generation
+    _rng_seed = seed
+    _rng_generation += 1
+
+
+def _reseed_after_fork() -> None:
+    # Forked workers would otherwise all draw the parent's jitter sequence
+    global _rng_generation
+    _rng_generation += 1
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
+
+
+def _rng() -> random.Random:
+    """Random number generator of the calling thread"""
+    if getattr(_tls, "generation", None) != _rng_generation:
+        _tls.rng = random.Random(_rng_seed)
+        _tls.generation = _rng_generation
+    return _tls.rng
+
+
+def _retry_sleep(
+    error: Exception,
+    backoff_delay: float,
+    compute_delay: Optional[Callable[[Exception, float], Optional[float]]],
+    deadline: Optional[float],
+    start: Optional[float]
+) -> Optional[float]:
+    """
+    Time to sleep before the next attempt
+    
+    Args:
+        error: Exception raised by the failed attempt
+        backoff_delay: Jittered backoff delay in seconds
+        compute_delay: Optional override (see retry)
+        deadline: Total budget in seconds, or None for no deadline
+        start: time.monotonic() when the budget started
+        
+    Returns:
+        Seconds to sleep, or None to stop retrying
+    """
+    if compute_delay is None:
+        return _sleep_budget(backoff_delay, deadline, start)
+    sleep_for = compute_delay(error, backoff_delay)
+    if sleep_for is None:
+        return None
+    budget = _sleep_budget(sleep_for, deadline, start)
+    # A delay above the backoff is a floor set by the callee; retrying
+    # before it has passed is wasted, so give up instead of shortening it
+    if sleep_for > backoff_delay and budget != sleep_for:
+        return None
+    return budget
+
+
+def _apply_jitter(delay: float, jitter: str) -> float:
+    """
+    Actual sleep time for a backoff delay
+    
+    Args:
+        delay: Backoff delay in seconds (without jitter)
+        jitter: Jitter mode (see JITTER_MODES)
+        
+    Returns:
+        Seconds to sleep
+    """
+    if jitter == "full":
+        return _rng().uniform(0, delay)
+    if jitter == "equal":
+        half = delay / 2
+        return half + _rng().uniform(0, half)
+    return delay
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling the function while a circuit breaker is open
+    
+    Attributes:
+        name: Name of the circuit breaker
+        retry_after: Seconds until the breaker lets a trial call through
+    """
+    
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit {name!r} is open, retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every function that calls one backend
+    
+    - CLOSED: calls go through; failure_threshold consecutive failed
+      calls open the circuit. With retry, a call fails once its retries
+      are used up, however many attempts it made.
+    - OPEN: calls raise CircuitOpen until recovery_timeout has passed.
+    - HALF_OPEN: up to half_open_max_calls trial calls go through; a
+      success closes the circuit, a failure opens it again.
+    
+    State changes are guarded by a threading.Lock. No lock is held
+    across the call itself, so the same breaker works for threads and
+    coroutines.
+    
+    Example:
+        breaker = CircuitBreaker(failure_threshold=5, name="search")
+        
+        @retry(exceptions=(ConnectionError,), breaker=breaker)
+        def search(query):
+            return client.search(query)
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "circuit"
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+    
+    def before_call(self) -> None:
+        """Raise CircuitOpen if the call must not go through"""
+        if self.state is self.CLOSED:
+            return
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._opened_at
+            if self.state is self.OPEN:
+                if elapsed < self.recovery_timeout:
+                    raise CircuitOpen(self.name, self.recovery_timeout - elapsed)
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                self._half_open_calls = 0
+            elif (
+                self.state is self.HALF_OPEN
+                and self._half_open_calls >= self.half_open_max_calls
+            ):
+                # Let another trial through if the previous ones never reported
+                if elapsed < self.recovery_timeout:
+                    raise CircuitOpen(self.name, self.recovery_timeout - elapsed)
+                self._opened_at = now
+                self._half_open_calls = 0
+            if self.state is self.HALF_OPEN:
+                self._half_open_calls += 1
+    
+    def on_success(self) -> None:
+        """Record a call that reached the backend"""
+        if self.state is self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+    
+    def on_failure(self) -> None:
+        """Record a transient failure; may open the circuit"""
+        with self._lock:
+            self._failures += 1
+            if self.state is self.OPEN:
+                # A call started before the circuit opened
+                return
+            if self.state is self.CLOSED and self._failures < self.failure_threshold:
+                return
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            failures = self._failures
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                "Circuit %s opened after %d failures",
+                self.name,
+                failures,
+                extra={"circuit": self.name, "failures": failures}
+            )
+    
+    def reset(self) -> None:
+        """Close the circuit and forget past failures"""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
 
 def retry(
     max_attempts: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable[[Exception, int], None]] = None
+    on_retry: Optional[Callable[[Exception, int], None]] = None,
+    jitter: str = "full",
+    max_delay: float = 60.0,
+    deadline: Optional[float] = None,
+    retry_if: Optional[Callable[[Exception], bool]] = None,
+    compute_delay: Optional[Callable[[Exception, float], Optional[float]]] = None,
+    breaker: Optional[CircuitBreaker] = None
 ):
     """
     Decorator to retry a function with exponential backoff
@@ -31,6 +355,21 @@ def retry(
         backoff: Multiplier for delay after each retry
         exceptions: Tuple of exception types to catch and retry
         on_retry: Optional callback function called on each retry
+        jitter: Backoff jitter mode: "none", "full" or "equal"
+        max_delay: Upper bound on the backoff delay in seconds
+        deadline: Optional budget in seconds for all attempts and sleeps;
+            no retry is started once it is used up
+        retry_if: Optional predicate on a caught exception; when it returns
+            False the exception is re-raised without retrying
+        compute_delay: Optional function of (exception, jittered delay)
+            returning the seconds to sleep, or None to stop retrying.
+            A result longer than the backoff (e.g. Retry-After) is a
+            minimum: if it does not fit in the deadline the exception
+            is raised instead of retrying early
+        breaker: Optional CircuitBreaker consulted once per call;
+            CircuitOpen is raised straight to the caller, without backoff.
+            A call that still fails after its retries counts as one
+            failure, and retrying stops as soon as the circuit is open
         
     Example:
         @retry(max_attempts=3, delay=1.0, backoff=2.0)
@@ -38,52 +377,96 @@ def retry(
             # This will retry up to 3 times with exponential backoff
             return api.get_data()
     """
+    _check_jitter(jitter)
+    
+    # Computed once per decorator; jitter is still applied per sleep
+    _delays = backoff_schedule(max_attempts, delay, backoff, max_delay)
+    
     def decorator(func: Callable) -> Callable:
+        func_name = func.__name__
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            current_delay = delay
-            last_exception = None
+            start = time.monotonic() if deadline is not None else None
+            # Measured length of the previous backoff sleep
+            prev_actual_delay = None
+            # The breaker sees one logical call, not every attempt
+            if breaker is not None:
+                breaker.before_call()
             
             for attempt in range(1, max_attempts + 1):
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
+                except _NEVER_RETRY:
+                    raise
                 except exceptions as e:
-                    last_exception = e
+                    # Caught but not worth retrying (e.g. a constraint violation);
+                    # the backend did answer, so it counts as healthy
+                    if retry_if is not None and not retry_if(e):
+                        if breaker is not None:
+                            breaker.on_success()
+                        raise
+                    
+                    # Give up when attempts or the deadline budget run out, or
+                    # when the circuit is not closed (opened by other calls, or
+                    # this is a half-open trial call)
+                    sleep_for = None
+                    if attempt < max_attempts and (
+                        breaker is None or breaker.state is CircuitBreaker.CLOSED
+                    ):
+                        sleep_for = _retry_sleep(
+                            e, _apply_jitter(_delays[attempt - 1], jitter),
+                            compute_delay, deadline, start
+                        )
                     
-                    if attempt == max_attempts:
-                        logger.error(
-                            f"Function {func.__name__} failed after {max_attempts} attempts",
-                            exc_info=True,
+                    if sleep_for is None:
+                        if breaker is not None:
+                            breaker.on_failure()
+                        if logger.isEnabledFor(logging.ERROR):
+                            logger.error(
+                                "Function %s failed after %d attempts",
+                                func_name,
+                                attempt,
+                                exc_info=True,
+                                extra={
+                                    "function": func_name,
+                                    "attempts": attempt,
+                                    "error": str(e)
+                                }
+                            )
+                        raise
+                    
+                    # Message and extra are only built if the record is emitted
+                    if logger.isEnabledFor(logging.WARNING):
+                        logger.warning(
+                            "Function %s failed (attempt %d/%d), retrying in %.2fs...",
+                            func_name,
+                            attempt,
+                            max_attempts,
+                            sleep_for,
                             extra={
-                                "function": func.__name__,
-                                "attempts": max_attempts,
+                                "function": func_name,
+                                "attempt": attempt,
+                                "max_attempts": max_attempts,
+                                "delay": sleep_for,
+                                "prev_actual_delay": prev_actual_delay,
                                 "error": str(e)
                             }
                         )
-                        raise
-                    
-                    logger.warning(
-                        f"Function {func.__name__} failed (attempt {attempt}/{max_attempts}), "
-                        f"retrying in {current_delay}s...",
-                        extra={
-                            "function": func.__name__,
-                            "attempt": attempt,
-                            "max_attempts": max_attempts,
-                            "delay": current_delay,
-                            "error": str(e)
-                        }
-                    )
                     
                     if on_retry:
                         on_retry(e, attempt)
                     
-                    time.sleep(current_delay)
-                    current_delay *= backoff
-            
-            # This should never be reached, but just in case
-            if last_exception:
-                raise last_exception
+                    slept_at = time.monotonic()
+                    time.sleep(sleep_for)
+                    prev_actual_delay = time.monotonic() - slept_at
+                    _record_sleep(prev_actual_delay)
+                else:
+                    if breaker is not None:
+                        breaker.on_success()
+                    return result
         
+        wrapper.retry_delays = _delays
         return wrapper
     return decorator
 
@@ -93,7 +476,13 @@ def async_retry(
     delay: float = 1.0,
     backoff: float = 2.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable[[Exception, int], None]] = None
+    on_retry: Optional[Callable[[Exception, int], None]] = None,
+    jitter: str = "full",
+    max_delay: float = 60.0,
+    deadline: Optional[float] = None,
+    retry_if: Optional[Callable[[Exception], bool]] = None,
+    compute_delay: Optional[Callable[[Exception, float], Optional[float]]] = None,
+    breaker: Optional[CircuitBreaker] = None
 ):
     """
     Async version of retry decorator
@@ -104,6 +493,21 @@ def async_retry(
         backoff: Multiplier for delay after each retry
         exceptions: Tuple of exception types to catch and retry
         on_retry: Optional callback function called on each retry
+        jitter: Backoff jitter mode: "none", "full" or "equal"
+        max_delay: Upper bound on the backoff delay in seconds
+        deadline: Optional budget in seconds for all attempts and sleeps;
+            no retry is started once it is used up
+        retry_if: Optional predicate on a caught exception; when it returns
+            False the exception is re-raised without retrying
+        compute_delay: Optional function of (exception, jittered delay)
+            returning the seconds to sleep, or None to stop retrying.
+            A result longer than the backoff (e.g. Retry-After) is a
+            minimum: if it does not fit in the deadline the exception
+            is raised instead of retrying early
+        breaker: Optional CircuitBreaker consulted once per call;
+            CircuitOpen is raised straight to the caller, without backoff.
+            A call that still fails after its retries counts as one
+            failure, and retrying stops as soon as the circuit is open
         
     Example:
         @async_retry(max_attempts=3, delay=1.0, backoff=2.0)
@@ -111,100 +515,432 @@ def async_retry(
             # This will retry up to 3 times with exponential backoff
             return await api.get_data()
     """
+    _check_jitter(jitter)
+    
+    # Computed once per decorator; jitter is still applied per sleep
+    _delays = backoff_schedule(max_attempts, delay, backoff, max_delay)
+    
     def decorator(func: Callable) -> Callable:
+        func_name = func.__name__
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            current_delay = delay
-            last_exception = None
+            start = time.monotonic() if deadline is not None else None
+            # Measured length of the previous backoff sleep
+            prev_actual_delay = None
+            # The breaker sees one logical call, not every attempt
+            if breaker is not None:
+                breaker.before_call()
             
             for attempt in range(1, max_attempts + 1):
                 try:
-                    return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
+                except _NEVER_RETRY_ASYNC:
+                    raise
                 except exceptions as e:
-                    last_exception = e
+                    # Caught but not worth retrying (e.g. a constraint violation);
+                    # the backend did answer, so it counts as healthy
+                    if retry_if is not None and not retry_if(e):
+                        if breaker is not None:
+                            breaker.on_success()
+                        raise
+                    
+                    # Give up when attempts or the deadline budget run out, or
+                    # when the circuit is not closed (opened by other calls, or
+                    # this is a half-open trial call)
+                    sleep_for = None
+                    if attempt < max_attempts and (
+                        breaker is None or breaker.state is CircuitBreaker.CLOSED
+                    ):
+                        sleep_for = _retry_sleep(
+                            e, _apply_jitter(_delays[attempt - 1], jitter),
+                            compute_delay, deadline, start
+                        )
+                    
+                    if sleep_for is None:
+                        if breaker is not None:
+                            breaker.on_failure()
+                        if logger.isEnabledFor(logging.ERROR):
+                            logger.error(
+                                "Async function %s failed after %d attempts",
+                                func_name,
+                                attempt,
+                                exc_info=True,
+                                extra={
+                                    "function": func_name,
+                                    "attempts": attempt,
+                                    "error": str(e)
+                                }
+                            )
+                        raise
                     
-                    if attempt == max_attempts:
-                        logger.error(
-                            f"Async function {func.__name__} failed after {max_attempts} attempts",
-                            exc_info=True,
+                    # Message and extra are only built if the record is emitted
+                    if logger.isEnabledFor(logging.WARNING):
+                        logger.warning(
+                            "Async function %s failed (attempt %d/%d), retrying in %.2fs...",
+                            func_name,
+                            attempt,
+                            max_attempts,
+                            sleep_for,
                             extra={
-                                "function": func.__name__,
-                                "attempts": max_attempts,
+                                "function": func_name,
+                                "attempt": attempt,
+                                "max_attempts": max_attempts,
+                                "delay": sleep_for,
+                                "prev_actual_delay": prev_actual_delay,
                                 "error": str(e)
                             }
                         )
-                        raise
-                    
-                    logger.warning(
-                        f"Async function {func.__name__} failed (attempt {attempt}/{max_attempts}), "
-                        f"retrying in {current_delay}s...",
-                        extra={
-                            "function": func.__name__,
-                            "attempt": attempt,
-                            "max_attempts": max_attempts,
-                            "delay": current_delay,
-                            "error": str(e)
-                        }
-                    )
                     
                     if on_retry:
                         on_retry(e, attempt)
                     
-                    await asyncio.sleep(current_delay)
-                    current_delay *= backoff
-            
-            # This should never be reached, but just in case
-            if last_exception:
-                raise last_exception
+                    slept_at = time.monotonic()
+                    await asyncio.sleep(sleep_for)
+                    prev_actual_delay = time.monotonic() - slept_at
+                    _record_sleep(prev_actual_delay)
+                else:
+                    if breaker is not None:
+                        breaker.on_success()
+                    return result
         
+        wrapper.retry_delays = _delays
         return wrapper
     return decorator
 
 
-def retry_on_db_error(max_attempts: int = 3, delay: float = 0.5):
+def smart_retry(**kwargs):
     """
-    Specialized retry decorator for database operations
+    Retry decorator for both sync and async functions
     
-    Retries on common database errors like connection issues,
-    deadlocks, and timeouts.
+    Picks async_retry for coroutine functions and retry otherwise. The
+    check runs once, when the function is decorated.
+    
+    Args:
+        **kwargs: Arguments for retry / async_retry
+        
+    Example:
+        @smart_retry(max_attempts=3, exceptions=(ConnectionError,))
+        async def fetch_data():
+            return await api.get_data()
+    """
+    sync_decorator = retry(**kwargs)
+    async_decorator = async_retry(**kwargs)
+    
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            return async_decorator(func)
+        return sync_decorator(func)
+    return decorator
+
+
+# Shared by all functions decorated with the specialized decorators below,
+# so callers stop together while the backend is down. Only calls that
+# still fail after retrying count towards the threshold.
+_db_breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30.0, name="database")
+_api_breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30.0, name="external_api")
+
+
+# SQLSTATEs that can succeed on a second try: serialization failure,
+# deadlock, lock not available and lost connections (class 08)
+TRANSIENT_SQLSTATES = frozenset({
+    "40001", "40P01", "55P03", "08000", "08003", "08006"
+})
+
+# HTTP statuses that can succeed on a second try
+TRANSIENT_HTTP_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def _error_chain(error: BaseException):
+    """Yield the error and the errors it wraps (original_error, orig, __cause__)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = (
+            getattr(error, "original_error", None)
+            or getattr(error, "orig", None)
+            or error.__cause__
+        )
+
+
+def _is_transient_db_error(error: Exception) -> bool:
+    """
+    Check whether a database error is worth retrying
+    
+    Uses the driver's SQLSTATE (asyncpg/psycopg ``sqlstate``, psycopg2
+    ``pgcode``) of the error or anything it wraps; without one, only
+    connection failures are treated as transient.
+    
+    Args:
+        error: Exception raised by the database operation
+        
+    Returns:
+        True if the operation should be retried
+    """
+    from app.exceptions import ErrorCode
+    
+    for err in _error_chain(error):
+        if isinstance(err, (ConnectionError, TimeoutError)):
+            return True
+        sqlstate = getattr(err, "sqlstate", None) or getattr(err, "pgcode", None)
+        if sqlstate is not None:
+            return sqlstate in TRANSIENT_SQLSTATES
+    return getattr(error, "error_code", None) == ErrorCode.DB_CONNECTION_ERROR
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an API error or anything it wraps, if known"""
+    for err in _error_chain(error):
+        status = getattr(err, "status_code", None)
+        if status is None:
+            context = getattr(err, "context", None)
+            if isinstance(context, dict):
+                status = context.get("status_code")
+        if status is None:
+            status = getattr(getattr(err, "response", None), "status_code", None)
+        if status is not None:
+            return status
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header on the error's response
+    
+    Accepts both forms of the header: delta-seconds and an HTTP date.
+    
+    Args:
+        error: Exception raised by the API call
+        
+    Returns:
+        Seconds to wait, or None if no usable header is present
+    """
+    for err in _error_chain(error):
+        headers = getattr(getattr(err, "response", None), "headers", None)
+        if not headers:
+            continue
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        if not value:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+    return None
+
+
+def _is_transient_api_error(error: Exception) -> bool:
+    """
+    Check whether an external API error is worth retrying
+    
+    Errors with an HTTP status are retried only for TRANSIENT_HTTP_STATUSES;
+    errors without one (timeouts, dropped connections) are retried.
+    
+    Args:
+        error: Exception raised by the API call
+        
+    Returns:
+        True if the call should be retried
+    """
+    status = _status_code(error)
+    return status is None or status in TRANSIENT_HTTP_STATUSES
+
+
+@functools.lru_cache(maxsize=32, typed=True)
+def retry_on_db_error(
+    max_attempts: int = 3,
+    delay: float = 0.5,
+    jitter: str = "full",
+    max_delay: float = 5.0
+):
+    """
+    Specialized retry decorator for sync and async database operations
+    
+    Retries only transient database errors: connection issues,
+    deadlocks, serialization failures and lock timeouts. Other errors
+    (constraint violations, bad SQL) are raised immediately.
+    
+    All decorated functions share one circuit breaker: once 5 calls
+    in a row have failed after all their retries, every decorated
+    function raises CircuitOpen for 30 seconds, then one trial call
+    decides whether it closes again.
+    
+    Decorators are cached per configuration, so repeated
+    ``@retry_on_db_error()`` call sites share one; for configs built at
+    runtime call retry(...) directly instead.
     
     Args:
         max_attempts: Maximum number of retry attempts
         delay: Initial delay between retries in seconds
+        jitter: Backoff jitter mode: "none", "full" or "equal"
+        max_delay: Upper bound on the backoff delay in seconds
     """
     # Import here to avoid circular dependencies
     from app.exceptions import DatabaseException
     
-    return retry(
+    return smart_retry(
         max_attempts=max_attempts,
         delay=delay,
         backoff=2.0,
-        exceptions=(DatabaseException, ConnectionError, TimeoutError)
+        exceptions=(DatabaseException, ConnectionError, TimeoutError),
+        jitter=jitter,
+        max_delay=max_delay,
+        retry_if=_is_transient_db_error,
+        breaker=_db_breaker
     )
 
 
-def retry_on_external_api_error(max_attempts: int = 3, delay: float = 1.0):
+@functools.lru_cache(maxsize=32, typed=True)
+def retry_on_external_api_error(
+    max_attempts: int = 3,
+    delay: float = 1.0,
+    jitter: str = "full",
+    max_delay: float = 30.0
+):
     """
-    Specialized retry decorator for external API calls
+    Specialized retry decorator for sync and async external API calls
     
     Retries on common API errors like timeouts, rate limits,
-    and temporary unavailability.
+    and temporary unavailability. Other HTTP errors (e.g. 400, 401,
+    404) are raised immediately. A Retry-After header on the error's
+    response overrides the backoff delay; if the server asks for more
+    than max_delay the error is raised instead of retrying early.
+    
+    All decorated functions share one circuit breaker: once 5 calls
+    in a row have failed after all their retries, every decorated
+    function raises CircuitOpen for 30 seconds, then one trial call
+    decides whether it closes again.
+    
+    Decorators are cached per configuration, so repeated
+    ``@retry_on_external_api_error()`` call sites share one; for configs built at
+    runtime call retry(...) directly instead.
     
     Args:
         max_attempts: Maximum number of retry attempts
         delay: Initial delay between retries in seconds
+        jitter: Backoff jitter mode: "none", "full" or "equal"
+        max_delay: Upper bound on the backoff delay in seconds
     """
     # Import here to avoid circular dependencies
     from app.exceptions import ExternalServiceException
     
-    return retry(
+    def _api_delay(e: Exception, base: float) -> Optional[float]:
+        # Never retry before the server's Retry-After; if it is past
+        # max_delay, give up rather than retry into another rejection
+        retry_after = _retry_after(e)
+        if retry_after is None:
+            return base
+        if retry_after > max_delay:
+            return None
+        return max(retry_after, base)
+    
+    return smart_retry(
         max_attempts=max_attempts,
         delay=delay,
         backoff=2.0,
-        exceptions=(ExternalServiceException, ConnectionError, TimeoutError)
+        exceptions=(ExternalServiceException, ConnectionError, TimeoutError),
+        jitter=jitter,
+        max_delay=max_delay,
+        retry_if=_is_transient_api_error,
+        compute_delay=_api_delay,
+        breaker=_api_breaker
     )
 
 
+def _default_cache_key(*args, **kwargs) -> Hashable:
+    """Cache key from the call arguments (all must be hashable)"""
+    if kwargs:
+        return args, tuple(sorted(kwargs.items()))
+    return args
+
+
+def retry_with_cache(
+    key_fn: Optional[Callable[..., Hashable]] = None,
+    cache: Optional[MutableMapping] = None,
+    maxsize: int = 1024,
+    **retry_kwargs
+):
+    """
+    Retry decorator that serves earlier successful results from a cache
+    
+    A cache hit returns without calling the function, so a retry only
+    ever runs on a miss. Failures are not cached. Only use this for
+    idempotent reads, never for calls with side effects.
+    
+    Works on both sync and async functions; retry_kwargs are passed to
+    retry or async_retry.
+    
+    Args:
+        key_fn: Function of the call arguments returning the cache key;
+            defaults to the positional and keyword arguments themselves
+        cache: Mapping used to store results, e.g. a diskcache.Cache to
+            share results across processes; defaults to an in-process
+            LRU of maxsize entries per decorated function
+        maxsize: Size of the default LRU cache (ignored if cache is given)
+        **retry_kwargs: Arguments for retry / async_retry
+        
+    Example:
+        @retry_with_cache(key_fn=lambda user_id: user_id, max_attempts=3)
+        def get_profile(user_id):
+            return api.get_profile(user_id)
+    """
+    if key_fn is None:
+        key_fn = _default_cache_key
+    
+    def decorator(func: Callable) -> Callable:
+        store = OrderedDict() if cache is None else cache
+        lru = cache is None
+        
+        def _get(key):
+            result = store[key]
+            if lru:
+                store.move_to_end(key)
+            return result
+        
+        def _put(key, result):
+            store[key] = result
+            if lru and len(store) > maxsize:
+                store.popitem(last=False)
+        
+        if asyncio.iscoroutinefunction(func):
+            retried = async_retry(**retry_kwargs)(func)
+            
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = key_fn(*args, **kwargs)
+                try:
+                    return _get(key)
+                except KeyError:
+                    pass
+                result = await retried(*args, **kwargs)
+                _put(key, result)
+                return result
+        else:
+            retried = retry(**retry_kwargs)(func)
+            
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = key_fn(*args, **kwargs)
+                try:
+                    return _get(key)
+                except KeyError:
+                    pass
+                result = retried(*args, **kwargs)
+                _put(key, result)
+                return result
+        
+        wrapper.cache = store
+        wrapper.retry_delays = retried.retry_delays
+        return wrapper
+    return decorator
+
+
 class RetryContext:
     """
     Context manager for retry logic with more control
@@ -226,13 +962,24 @@ class RetryContext:
         max_attempts: int = 3,
         delay: float = 1.0,
         backoff: float = 2.0,
-        exceptions: Tuple[Type[Exception], ...] = (Exception,)
+        exceptions: Tuple[Type[Exception], ...] = (Exception,),
+        jitter: str = "full",
+        max_delay: float = 60.0,
+        deadline: Optional[float] = None
     ):
+        _check_jitter(jitter)
         self.max_attempts = max_attempts
-        self.initial_delay = delay
-        self.current_delay = delay
+        self.initial_delay = min(delay, max_delay)
+        self.current_delay = self.initial_delay
         self.backoff = backoff
         self.exceptions = exceptions
+        # Exact exception types, checked before the isinstance() walk
+        self._exc_set = frozenset(exceptions)
+        self.jitter = jitter
+        self.max_delay = max_delay
+        # Budget in seconds for the whole loop, measured from __iter__
+        self.deadline = deadline
+        self._start = time.monotonic()
         self.attempt = 0
     
     def __enter__(self):
@@ -243,28 +990,74 @@ class RetryContext:
     
     def __iter__(self):
         self.attempt = 0
-        return self
-    
-    def __next__(self):
-        self.attempt += 1
-        if self.attempt > self.max_attempts:
-            raise StopIteration
-        return self.attempt
+        self._start = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            self.attempt = attempt
+            yield attempt
     
     def should_retry(self, exception: Exception) -> bool:
         """Check if the exception should trigger a retry"""
-        return isinstance(exception, self.exceptions) and self.attempt < self.max_attempts
+        if self.attempt >= self.max_attempts:
+            return False
+        if _sleep_budget(0.0, self.deadline, self._start) is None:
+            return False
+        return type(exception) in self._exc_set or isinstance(exception, self.exceptions)
+    
+    def _next_sleep(self) -> Optional[float]:
+        """Advance the backoff and return the time to sleep, or None if done"""
+        if self.attempt >= self.max_attempts:
+            return None
+        sleep_for = _sleep_budget(
+            _apply_jitter(self.current_delay, self.jitter), self.deadline, self._start
+        )
+        if sleep_for is None:
+            return None
+        logger.info(
+            "Retrying in %.2fs (attempt %d/%d)", sleep_for, self.attempt, self.max_attempts
+        )
+        self.current_delay = min(self.current_delay * self.backoff, self.max_delay)
+        return sleep_for
     
     def wait(self):
         """Wait before the next retry"""
-        if self.attempt < self.max_attempts:
-            logger.info(
-                f"Retrying in {self.current_delay}s (attempt {self.attempt}/{self.max_attempts})"
-            )
-            time.sleep(self.current_delay)
-            self.current_delay *= self.backoff
+        sleep_for = self._next_sleep()
+        if sleep_for is not None:
+            time.sleep(sleep_for)
     
     def reset(self):
         """Reset the retry context"""
         self.attempt = 0
+        self._start = time.monotonic()
         self.current_delay = self.initial_delay
+
+
+class AsyncRetryContext(RetryContext):
+    """
+    RetryContext for async code
+    
+    wait() is a coroutine that sleeps with asyncio.sleep, so other tasks
+    keep running during backoff.
+    
+    Example:
+        async with AsyncRetryContext(max_attempts=3) as retry_ctx:
+            for attempt in retry_ctx:
+                try:
+                    result = await perform_operation()
+                    break
+                except Exception as e:
+                    if not retry_ctx.should_retry(e):
+                        raise
+                    await retry_ctx.wait()
+    """
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+    
+    async def wait(self):
+        """Wait before the next retry without blocking the event loop"""
+        sleep_for = self._next_sleep()
+        if sleep_for is not None:
+            await asyncio.sleep(sleep_for)